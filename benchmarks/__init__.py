@@ -0,0 +1 @@
+"""SmartLimit veri hattı için performans ölçümleri (python -m benchmarks.<modül>)."""
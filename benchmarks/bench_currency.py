@@ -0,0 +1,84 @@
+# --- clean_currency: eski apply ile vektörel sürümün karşılaştırması ---
+# python -m benchmarks.bench_currency [--rows 1000000 10000000] [--dtype object|str]
+# Checks that the vectorized parser matches the legacy per-cell function
+# value-for-value, then times both on synthetic "$1,234.56" style columns.
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from smartlimit.cleaning import clean_currency_column
+
+EDGE_CASES = ["$1,000.50", "", "   ", "abc", None, np.nan, "12", " $3 ", "1_000",
+              "inf", "nan", "$", "-$5", "$-5", "5-", "--5", "-", "-.", "1.2.3", "+.5", "1e3", "$12,345,678.9", 7, 2.5, True, False]
+
+
+def legacy_clean_currency(x):
+    # Verbatim copy of the helper that used to live in load_and_clean_merged_csv
+    if isinstance(x, str):
+        if x.strip() == '':
+            return pd.NA
+        try:
+            return float(x.replace('$', '').replace(',', '').strip())
+        except ValueError:
+            return pd.NA
+    return x
+
+
+def legacy_clean(series):
+    return series.apply(legacy_clean_currency).astype(float, errors='ignore')
+
+
+def make_column(rows, seed=0, bad_fraction=0.001):
+    rng = np.random.default_rng(seed)
+    values = rng.gamma(2.0, 5000.0, rows).round(2)
+    text = pd.Series(values).map("${:,.2f}".format).astype(object)
+    bad = rng.random(rows) < bad_fraction
+    text[bad] = rng.choice(["", "n/a", " ", "$"], bad.sum())
+    return text
+
+
+def assert_equivalent(series):
+    expected = pd.to_numeric(legacy_clean(series), errors="coerce").astype("float64")
+    actual, coerced = clean_currency_column(series)
+    pd.testing.assert_series_equal(actual, expected, check_names=False)
+    return coerced
+
+
+def time_call(func, *args):
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="clean_currency eşdeğerlik ve hız testi")
+    parser.add_argument("--rows", type=int, nargs="+", default=[1_000_000, 10_000_000])
+    parser.add_argument("--skip-legacy-above", type=int, default=10_000_000,
+                        help="do not time the legacy apply above this many rows")
+    parser.add_argument("--dtype", choices=("object", "str"), default="object",
+                        help="column dtype; read_csv gives 'str' on pandas 3")
+    args = parser.parse_args()
+
+    edge = pd.Series(EDGE_CASES, dtype=object)
+    print(f"edge cases equivalent, coerced={assert_equivalent(edge)}")
+    sample = make_column(100_000)
+    print(f"100k sample equivalent, coerced={assert_equivalent(sample)}")
+    print(f"bool column equivalent, coerced={assert_equivalent(pd.Series([True, False, True]))}")
+    print(f"string dtype equivalent, coerced={assert_equivalent(sample.astype('string').astype(object))}")
+
+    print(f"{'rows':>12} {'legacy s':>10} {'vector s':>10} {'speedup':>8}")
+    for rows in args.rows:
+        column = make_column(rows).astype(args.dtype)
+        vector = time_call(clean_currency_column, column)
+        if rows <= args.skip_legacy_above:
+            legacy = time_call(legacy_clean, column)
+            print(f"{rows:>12,} {legacy:>10.2f} {vector:>10.2f} {legacy / vector:>7.1f}x")
+        else:
+            print(f"{rows:>12,} {'-':>10} {vector:>10.2f} {'-':>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+# --- pandas ve DuckDB motorlarının karşılaştırması ---
+# python -m benchmarks.bench_engines [--rows 1000000 5000000]
+# Builds a cleaned, segmented frame by resampling the local prediction.csv sample,
+# checks that every DuckDB query matches the pandas engine, then times both
+# (DuckDB over the registered DataFrame and over a Parquet file).
+
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from smartlimit.engines import DuckDBEngine, PandasEngine
+from smartlimit.schema import apply_schema
+
+SAMPLE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "prediction.csv")
+QUERIES = ['segment_metrics', 'segment_counts', 'monthly_spend', 'card_limit', 'gender_debt',
+           'gender_limit', 'card_spending', 'mtd_change_pct', 'aggregates']
+
+
+def make_frame(rows, seed=0):
+    sample = pd.read_csv(SAMPLE_PATH, parse_dates=['txn_date']).drop(columns=['errors', 'merchant_id'])
+    rng = np.random.default_rng(seed)
+    df = sample.iloc[rng.integers(0, len(sample), rows)].reset_index(drop=True)
+    df['txn_date'] = df['txn_date'] + pd.to_timedelta(rng.integers(0, 3650, rows), unit='D')
+    df['amount'] = (df['amount'] * rng.uniform(0.5, 1.5, rows)).round(2)
+    df['prediction_rf'] = (df['user_id'] % 97) * 100.0
+    apply_schema(df)
+    return df
+
+
+def normalize(result):
+    if isinstance(result, pd.DataFrame):
+        result = result.reset_index(drop=True)
+        return result.astype({c: object for c in result.columns if result[c].dtype.name in ('category', 'str', 'string')})
+    if isinstance(result, pd.Series):
+        result = result.rename_axis(None).rename(None).astype('int64')
+        result.index = result.index.astype(object)
+        return result
+    return result
+
+
+def assert_same(name, expected, actual):
+    if name == 'aggregates':
+        for key, value in expected.eda_preview().items():
+            assert_same(key, value, actual.eda_preview()[key])
+        for key, value in expected.advanced_kpis().items():
+            assert_same(key, value, actual.advanced_kpis()[key])
+        return
+    expected, actual = normalize(expected), normalize(actual)
+    if isinstance(expected, pd.DataFrame):
+        pd.testing.assert_frame_equal(expected, actual, check_dtype=False, check_exact=False, rtol=1e-9)
+    elif isinstance(expected, pd.Series):
+        pd.testing.assert_series_equal(expected, actual, check_index_type=False)
+    else:
+        assert np.isclose(expected, actual), (name, expected, actual)
+
+
+def time_call(func):
+    start = time.perf_counter()
+    result = func()
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="pandas / DuckDB sorgu motoru karşılaştırması")
+    parser.add_argument("--rows", type=int, nargs="+", default=[1_000_000, 5_000_000])
+    args = parser.parse_args()
+
+    for rows in args.rows:
+        df = make_frame(rows)
+        with tempfile.TemporaryDirectory() as tmp:
+            parquet_path = os.path.join(tmp, "clean.parquet")
+            df.to_parquet(parquet_path, index=False)
+            engines = [PandasEngine(df), DuckDBEngine(frame=df, temp_directory=tmp),
+                       DuckDBEngine(parquet_path=parquet_path, temp_directory=tmp)]
+            labels = ["pandas", "duckdb/frame", "duckdb/parquet"]
+
+            print(f"\n{rows:,} satır")
+            print(f"{'query':<16}" + "".join(f"{label:>16}" for label in labels))
+            for query in QUERIES:
+                timings = []
+                results = []
+                for engine in engines:
+                    seconds, result = time_call(getattr(engine, query))
+                    timings.append(seconds)
+                    results.append(result)
+                for result in results[1:]:
+                    assert_same(query, results[0], result)
+                print(f"{query:<16}" + "".join(f"{seconds:>15.3f}s" for seconds in timings))
+    print("\nAll DuckDB results match the pandas engine.")
+
+
+if __name__ == "__main__":
+    main()
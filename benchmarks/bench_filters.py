@@ -0,0 +1,81 @@
+# --- Filtre pushdown: küp dilimi ve Parquet predicate pushdown ---
+# python -m benchmarks.bench_filters [--rows 100000 1000000] [--repeat 20]
+# For synthetic histories of different lengths, times a one-month, one-segment
+# KPI request three ways: slicing the full frame in pandas, reading the cached
+# Parquet file with the filter pushed down (row-group pruning), and slicing the
+# aggregate cube. Also checks that the cube and the frame give the same totals.
+
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import PREDICTIONS_NAME, generate
+from smartlimit.aggregates import TransactionAggregates
+from smartlimit.cache import FrameCache
+from smartlimit.filters import Filters
+from smartlimit.pipeline import PIPELINE_PARAMS, build_frame
+from smartlimit.predictions import PredictionStore
+from smartlimit.segmentation import SegmentationConfig
+from smartlimit.sources import ShardSource
+
+DATA_DIR = os.path.join(tempfile.gettempdir(), "smartlimit-synthetic")
+
+
+def best_of(repeat, function):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        times.append(time.perf_counter() - start)
+    return min(times) * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Filtre pushdown benchmark'ı")
+    parser.add_argument("--rows", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'rows':>10}{'months':>8}{'pandas ms':>11}{'parquet ms':>12}{'cube ms':>9}{'matched':>10}")
+    for rows in args.rows:
+        data_dir = os.path.join(DATA_DIR, f"{rows}-10-500")
+        generate(data_dir, rows, 10, 500)
+        with tempfile.TemporaryDirectory() as directory:
+            predictions = PredictionStore.read_csv(os.path.join(data_dir, PREDICTIONS_NAME))
+            df = build_frame(ShardSource.from_spec(data_dir), predictions, PIPELINE_PARAMS, SegmentationConfig(),
+                             os.path.join(directory, "models")).df
+            cache = FrameCache(directory)
+            cache.store("bench", df)
+            aggregates = TransactionAggregates.from_frame(df)
+
+            last = df['txn_date'].max()
+            segment = df['segment_label'].value_counts().index[0]
+            filters = Filters(start=(last - pd.offsets.MonthBegin(1)).date(), end=last.date(), segments=[segment])
+            start, end = pd.Timestamp(filters.start), pd.Timestamp(filters.end) + pd.Timedelta(days=1)
+
+            def pandas_slice():
+                mask = (df['txn_date'] >= start) & (df['txn_date'] < end) & df['segment_label'].isin(filters.segments)
+                return float(df.loc[mask, 'amount'].sum())
+
+            def parquet_pushdown():
+                return float(cache.load("bench", filters)['amount'].sum())
+
+            def cube_slice():
+                return aggregates.filter(filters).cube['amount_sum'].sum()
+
+            pandas_ms, expected = best_of(args.repeat, pandas_slice)
+            parquet_ms, pushed = best_of(args.repeat, parquet_pushdown)
+            cube_ms, sliced = best_of(args.repeat, cube_slice)
+            # Both filters start on a month boundary here, so the whole-month cube slice is exact
+            assert np.isclose(expected, pushed, rtol=1e-6) and np.isclose(expected, sliced, rtol=1e-4), \
+                (expected, pushed, sliced)
+            months = aggregates.cube['txn_month'].nunique()
+            print(f"{rows:>10,}{months:>8}{pandas_ms:>11.2f}{parquet_ms:>12.2f}{cube_ms:>9.2f}{expected:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+# --- Pipeline aşama benchmark'ı (baseline karşılaştırmalı) ---
+# python -m benchmarks.bench_pipeline [--rows 100000 1000000] [--baseline benchmarks/baseline.json]
+#                                     [--save-baseline] [--tolerance 0.3]
+# Generates synthetic shards (benchmarks.synthetic, reused between runs), then runs
+# every stage of load_and_clean_merged_csv (smartlimit.pipeline.build_frame) and the
+# two KPI builders offline, without Streamlit. Wall time per stage is the best of
+# --repeat runs; peak memory (what each stage allocated on top of what it started
+# with) comes from one extra run under tracemalloc. Stages that got slower or
+# hungrier than the stored baseline by more than the tolerance are listed and the
+# exit code is 1, so the script can gate a deploy.
+
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+
+import pandas as pd
+
+from benchmarks.synthetic import PREDICTIONS_NAME, generate
+from smartlimit import instrumentation
+from smartlimit.aggregates import TransactionAggregates
+from smartlimit.pipeline import PIPELINE_PARAMS, build_frame
+from smartlimit.predictions import PredictionStore
+from smartlimit.segmentation import SegmentationConfig
+from smartlimit.sources import ShardSource
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+DATA_DIR = os.path.join(tempfile.gettempdir(), "smartlimit-synthetic")
+# Sub-noise stages (a few ms) are never reported as time regressions
+MIN_SECONDS = 0.05
+# Shards are read in parallel, so their own timings overlap; download_parse covers them
+SKIPPED_PREFIXES = ("download_parse/",)
+
+
+def run_once(data_dir, config):
+    """One pass over every stage; returns the instrumented runs."""
+    with tempfile.TemporaryDirectory() as model_directory: # Fresh model: the first build fits
+        with instrumentation.run("load_and_clean_merged_csv") as load_run:
+            predictions = PredictionStore.read_csv(os.path.join(data_dir, PREDICTIONS_NAME))
+            build = build_frame(ShardSource.from_spec(data_dir), predictions, PIPELINE_PARAMS, config,
+                                model_directory)
+    # The app's create_eda_dashboard_preview / generate_advanced_kpi_and_charts
+    with instrumentation.run("create_eda_dashboard_preview") as eda_run:
+        TransactionAggregates.from_frame(build.df).eda_preview()
+    with instrumentation.run("generate_advanced_kpi_and_charts") as kpi_run:
+        TransactionAggregates.from_frame(build.df).advanced_kpis()
+    return [load_run, eda_run, kpi_run]
+
+
+def measure(data_dir, config, repeat, memory):
+    results = {}
+    for _ in range(repeat):
+        for pipeline_run in run_once(data_dir, config):
+            stages = results.setdefault(pipeline_run.name, {})
+            total = stages.setdefault("total", {"seconds": float("inf")})
+            total["seconds"] = min(total["seconds"], pipeline_run.seconds)
+            for record in pipeline_run.stages:
+                if record.stage.startswith(SKIPPED_PREFIXES):
+                    continue
+                entry = stages.setdefault(record.stage, {"seconds": float("inf"), "rows_out": record.rows_out})
+                entry["seconds"] = min(entry["seconds"], record.seconds)
+    if memory:
+        os.environ[instrumentation.PROFILE_MEMORY_ENV_VAR] = "1"
+        try:
+            for pipeline_run in run_once(data_dir, config):
+                for record in pipeline_run.stages:
+                    if record.stage in results[pipeline_run.name]:
+                        results[pipeline_run.name][record.stage]["peak_mb"] = record.peak_mb
+        finally:
+            del os.environ[instrumentation.PROFILE_MEMORY_ENV_VAR]
+    for stages in results.values():
+        for entry in stages.values():
+            entry.update({k: round(v, 4) for k, v in entry.items() if isinstance(v, float)})
+    return results
+
+
+def compare(results, baseline, tolerance, memory_tolerance):
+    """``(stage, measure, baseline, now)`` for every regression beyond the tolerance."""
+    regressions = []
+    for name, stages in results.items():
+        for stage, entry in stages.items():
+            reference = baseline.get(name, {}).get(stage)
+            if reference is None:
+                continue
+            if (entry["seconds"] > reference["seconds"] * (1 + tolerance)
+                    and entry["seconds"] - reference["seconds"] > MIN_SECONDS):
+                regressions.append((f"{name}/{stage}", "seconds", reference["seconds"], entry["seconds"]))
+            if (entry.get("peak_mb") is not None and reference.get("peak_mb") is not None
+                    and entry["peak_mb"] > reference["peak_mb"] * (1 + memory_tolerance)):
+                regressions.append((f"{name}/{stage}", "peak_mb", reference["peak_mb"], entry["peak_mb"]))
+    return regressions
+
+
+def report(rows, results, baseline):
+    print(f"\n{rows:,} satır")
+    print(f"{'stage':<50}{'seconds':>9}{'base':>9}{'peak MB':>9}{'base':>9}{'rows out':>12}")
+    for name, stages in results.items():
+        for stage, entry in stages.items():
+            reference = baseline.get(name, {}).get(stage, {})
+            cells = [entry["seconds"], reference.get("seconds"), entry.get("peak_mb"), reference.get("peak_mb")]
+            print(f"{name + '/' + stage:<50}" + "".join(f"{c:>9.3f}" if c is not None else f"{'-':>9}"
+                                                          for c in cells)
+                  + (f"{entry['rows_out']:>12,}" if entry.get("rows_out") is not None else f"{'-':>12}"))
+
+
+def environment():
+    return {"python": platform.python_version(), "pandas": pd.__version__, "machine": platform.machine(),
+            "cpus": os.cpu_count()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SmartLimit pipeline aşama benchmark'ı")
+    parser.add_argument("--rows", type=int, nargs="+", default=[100_000])
+    parser.add_argument("--shards", type=int, default=10)
+    parser.add_argument("--txns-per-user", type=int, default=500)
+    parser.add_argument("--data-dir", default=DATA_DIR, help="Synthetic shards are kept here between runs")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--no-memory", action="store_true", help="Skip the tracemalloc run")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true", help="Store this run as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.3, help="Allowed slowdown, e.g. 0.3 = 30%%")
+    parser.add_argument("--memory-tolerance", type=float, default=0.2)
+    args = parser.parse_args()
+
+    config = SegmentationConfig.from_env()
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("environment") != environment():
+            print(f"Baseline environment differs ({baseline.get('environment')} vs {environment()}); "
+                  "compare with care", file=sys.stderr)
+
+    results, regressions = {}, []
+    for rows in args.rows:
+        data_dir = os.path.join(args.data_dir, f"{rows}-{args.shards}-{args.txns_per_user}")
+        generate(data_dir, rows, args.shards, args.txns_per_user)
+        results[str(rows)] = measure(data_dir, config, args.repeat, not args.no_memory)
+        size_baseline = baseline.get("sizes", {}).get(str(rows), {})
+        report(rows, results[str(rows)], size_baseline)
+        regressions += [(f"{rows}:{stage}", *rest) for stage, *rest in
+                        compare(results[str(rows)], size_baseline, args.tolerance, args.memory_tolerance)]
+
+    if args.save_baseline:
+        sizes = {**baseline.get("sizes", {}), **results}
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump({"environment": environment(), "segmentation": config.cache_params(), "sizes": sizes},
+                      f, indent=2)
+        print(f"\nBaseline kaydedildi: {args.baseline}")
+    if regressions:
+        print("\nRegresyonlar:")
+        for stage, measure_name, before, after in regressions:
+            print(f"  {stage} {measure_name}: {before:.3f} -> {after:.3f}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+# --- Segmentasyon stratejilerinin hız/kalite karşılaştırması ---
+# python -m benchmarks.bench_segmentation [--rows 100000 1000000] [--sample-sizes 50000 200000]
+# For each size, fits the full K-Means once and compares every faster strategy
+# against it: wall time, inertia on all rows and label agreement.
+
+import argparse
+
+from benchmarks.bench_engines import make_frame
+from smartlimit.pipeline import PIPELINE_PARAMS
+from smartlimit.segmentation import SegmentationConfig, compare_to_full, segment, segment_features
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Segmentasyon motoru hız/kalite karşılaştırması")
+    parser.add_argument("--rows", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--sample-sizes", type=int, nargs="+", default=[50_000, 200_000])
+    parser.add_argument("--threads", type=int, default=None)
+    args = parser.parse_args()
+
+    for rows in args.rows:
+        features = segment_features(make_frame(rows), PIPELINE_PARAMS)
+        full = segment(features, PIPELINE_PARAMS, SegmentationConfig(method="full", n_threads=args.threads))
+        configs = [SegmentationConfig(method="sample", sample_size=n, n_threads=args.threads)
+                   for n in args.sample_sizes if n < rows]
+        configs.append(SegmentationConfig(method="minibatch", n_threads=args.threads))
+
+        print(f"\n{rows:,} satır — full K-Means: {full.timings['total']:.2f}s")
+        print(f"{'strategy':<22}{'seconds':>9}{'speedup':>9}{'inertia ratio':>15}{'agreement':>11}{'ARI':>7}")
+        for config in configs:
+            report = compare_to_full(features, PIPELINE_PARAMS, config, full=full)
+            label = config.method if config.method != "sample" else f"sample {config.sample_size:,}"
+            print(f"{label:<22}{report['seconds']:>8.2f}s{report['speedup']:>8.1f}x"
+                  f"{report['inertia_ratio']:>15.4f}{report['label_agreement']:>10.1%}{report['adjusted_rand']:>7.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+# --- Paylaşılan önbellek: replika başına bellek ve tek soğuk build ---
+# python -m benchmarks.bench_shared_cache [--rows 3000000] [--workers 4]
+# Starts N worker processes that all ask for the same missing cache entry at the
+# same time, like Streamlit replicas after a deploy. Reports how many of them
+# built it and how much anonymous (non-shareable) memory each one holds after
+# reading every column, for the local Parquet and the shared Arrow IPC backend.
+
+import argparse
+import multiprocessing
+import os
+import tempfile
+import time
+
+from benchmarks.bench_engines import make_frame
+from smartlimit.cache import build_once, get_frame_cache
+
+
+def anonymous_mb():
+    # Heap pages of this process; mmap'ed cache pages are file-backed and shared
+    # (Private_Dirty would also count freshly written, not yet flushed file pages)
+    with open("/proc/self/smaps_rollup") as f:
+        for line in f:
+            if line.startswith("Anonymous:"):
+                return int(line.split()[1]) / 1024
+    return float("nan")
+
+
+def worker(backend, directory, rows, barrier, results):
+    def build():
+        results.put(("built", os.getpid()))
+        return make_frame(rows), True
+
+    barrier.wait()
+    before = anonymous_mb()
+    start = time.perf_counter()
+    df = build_once(get_frame_cache(directory=directory, backend=backend), "bench", build)
+    for column in df.columns: # Touch every column, like the aggregations do
+        df[column].iloc[::997].tolist()
+    results.put(("worker", time.perf_counter() - start, anonymous_mb() - before))
+
+
+def run(backend, rows, workers):
+    with tempfile.TemporaryDirectory() as directory:
+        context = multiprocessing.get_context("spawn") # Fresh interpreters, like separate replicas
+        barrier = context.Barrier(workers)
+        results = context.Queue()
+        processes = [context.Process(target=worker, args=(backend, directory, rows, barrier, results))
+                     for _ in range(workers)]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+        messages = [results.get() for _ in range(results.qsize())]
+    builds = sum(1 for m in messages if m[0] == "built")
+    per_worker = sorted(m[2] for m in messages if m[0] == "worker")
+    seconds = max(m[1] for m in messages if m[0] == "worker")
+    print(f"{backend:<8}{builds:>8}{seconds:>10.2f}s" + "".join(f"{mb:>9.0f}" for mb in per_worker))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Paylaşılan önbellek bellek/build karşılaştırması")
+    parser.add_argument("--rows", type=int, default=3_000_000)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    print(f"{args.rows:,} satır, {args.workers} worker — anonymous MB per worker after load")
+    print(f"{'backend':<8}{'builds':>8}{'wall':>11}  per worker")
+    for backend in ("local", "shared"):
+        run(backend, args.rows, args.workers)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+# --- Sentetik işlem verisi üretici ---
+# python -m benchmarks.synthetic --rows 1000000 [--shards 10] [--txns-per-user 500] --out ./synthetic
+# Writes merged_data_part<i>.csv shards with the columns and text formats of the
+# real export ("$5,642.00" balances, "2010-02-07 12:51:00" dates, "$-64.00"
+# refunds, sparse ``errors``) plus a prediction CSV with one row per user, so
+# SMARTLIMIT_DATA_SOURCE=<out> SMARTLIMIT_PREDICTION_SOURCE=<out>/predictions.csv
+# runs the app and the benchmarks offline at any size.
+#
+# Users are fixed (gender, credit score, income, debt, 1-3 cards) and their
+# activity is skewed, like the real data: a few users make many transactions.
+# Shards cover consecutive date ranges, as the export does.
+
+import argparse
+import glob
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+COLUMNS = ['user_id', 'gender', 'credit_score', 'total_debt', 'yearly_income', 'card_id', 'card_brand',
+           'card_type', 'card_on_dark_web', 'credit_limit', 'txn_date', 'amount', 'merchant_id', 'errors']
+CARD_BRANDS = (['Mastercard', 'Visa', 'Amex', 'Discover'], [0.55, 0.36, 0.07, 0.02])
+CARD_TYPES = (['Debit', 'Credit', 'Debit (Prepaid)'], [0.62, 0.30, 0.08])
+ERRORS = (['Insufficient Balance', 'Technical Glitch', 'Bad PIN', 'Bad Expiration', 'Bad Card Number'],
+          [0.62, 0.15, 0.13, 0.07, 0.03])
+ERROR_RATE = 0.012
+REFUND_RATE = 0.05
+START_DATE = pd.Timestamp("2010-01-01")
+MANIFEST_NAME = "synthetic.json"
+PREDICTIONS_NAME = "predictions.csv"
+
+
+def dollars(values):
+    """``"$1,234.00"`` strings, the currency format of the export."""
+    return pd.Series(values).map("${:,.2f}".format)
+
+
+def make_users(n_users, rng):
+    users = pd.DataFrame({'user_id': np.arange(n_users, dtype=np.int64)})
+    users['gender'] = rng.choice(['Female', 'Male'], n_users)
+    users['credit_score'] = np.clip(rng.normal(714, 64, n_users), 480, 850).round().astype(np.int64)
+    users['yearly_income'] = np.exp(rng.normal(10.6, 0.5, n_users)).round()
+    has_debt = rng.random(n_users) > 0.15
+    users['total_debt'] = np.where(has_debt, users['yearly_income'] * rng.gamma(2.0, 0.6, n_users), 0).round()
+    # Skewed activity: transaction share of each user
+    users['activity'] = rng.gamma(0.8, 1.0, n_users)
+    users['activity'] /= users['activity'].sum()
+    users['prediction_rf'] = (users['yearly_income'] * 0.25 * (users['credit_score'] / 714)).round(-2)
+    return users
+
+
+def make_cards(users, rng):
+    n_cards = rng.integers(1, 4, len(users))
+    cards = pd.DataFrame({'user_id': np.repeat(users['user_id'].to_numpy(), n_cards)})
+    cards['card_id'] = np.arange(len(cards), dtype=np.int64)
+    cards['card_brand'] = rng.choice(CARD_BRANDS[0], len(cards), p=CARD_BRANDS[1])
+    cards['card_type'] = rng.choice(CARD_TYPES[0], len(cards), p=CARD_TYPES[1])
+    cards['card_on_dark_web'] = False
+    income = users['yearly_income'].to_numpy()[cards['user_id'].to_numpy()]
+    cards['credit_limit'] = (income * rng.uniform(0.05, 0.4, len(cards))).round()
+    return cards
+
+
+def make_shard(users, cards, rows, start, end, rng):
+    """``rows`` transactions between ``start`` and ``end`` in the export's text format."""
+    user_ids = rng.choice(len(users), rows, p=users['activity'].to_numpy())
+    # A random card of the chosen user
+    first_card = np.searchsorted(cards['user_id'].to_numpy(), user_ids)
+    card_count = np.bincount(cards['user_id'].to_numpy(), minlength=len(users))[user_ids]
+    card_rows = first_card + (rng.random(rows) * card_count).astype(np.int64)
+
+    minutes = np.sort(rng.integers(0, max(1, int((end - start) / pd.Timedelta(minutes=1))), rows))
+    amount = np.exp(rng.normal(3.4, 1.1, rows)).round(2)
+    refunds = rng.random(rows) < REFUND_RATE
+    amount[refunds] = -rng.integers(50, 150, refunds.sum()).astype('float64')
+    errors = np.full(rows, None, dtype=object)
+    failed = rng.random(rows) < ERROR_RATE
+    errors[failed] = rng.choice(ERRORS[0], failed.sum(), p=ERRORS[1])
+
+    user_cols = users.iloc[user_ids]
+    card_cols = cards.iloc[card_rows]
+    return pd.DataFrame({
+        'user_id': user_ids,
+        'gender': user_cols['gender'].to_numpy(),
+        'credit_score': user_cols['credit_score'].to_numpy(),
+        'total_debt': user_cols['total_debt_text'].to_numpy(),
+        'yearly_income': user_cols['yearly_income_text'].to_numpy(),
+        'card_id': card_cols['card_id'].to_numpy(),
+        'card_brand': card_cols['card_brand'].to_numpy(),
+        'card_type': card_cols['card_type'].to_numpy(),
+        'card_on_dark_web': card_cols['card_on_dark_web'].to_numpy(),
+        'credit_limit': card_cols['credit_limit_text'].to_numpy(),
+        'txn_date': start + pd.to_timedelta(minutes, unit='min'),
+        'amount': dollars(amount).to_numpy(),
+        'merchant_id': rng.integers(10_000, 100_000, rows),
+        'errors': errors,
+    }, columns=COLUMNS)
+
+
+def generate(out, rows, shards=10, txns_per_user=500, days_per_shard=365, seed=0):
+    """Write ``rows`` transactions in ``shards`` files (plus predictions) to ``out``.
+
+    A directory already holding the same parameters is reused. Returns the manifest.
+    """
+    params = {"rows": rows, "shards": shards, "txns_per_user": txns_per_user,
+              "days_per_shard": days_per_shard, "seed": seed}
+    manifest_path = os.path.join(out, MANIFEST_NAME)
+    if os.path.exists(manifest_path):
+        with open(manifest_path, encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest.get("params") == params:
+            return manifest
+
+    os.makedirs(out, exist_ok=True)
+    for stale in glob.glob(os.path.join(out, "merged_data_part*.csv")): # Fewer shards than last time
+        os.remove(stale)
+    start = time.perf_counter()
+    rng = np.random.default_rng(seed)
+    users = make_users(max(1, rows // txns_per_user), rng)
+    cards = make_cards(users, rng)
+    # Per-user and per-card text columns are formatted once, not per transaction
+    users['total_debt_text'] = dollars(users['total_debt']).to_numpy()
+    users['yearly_income_text'] = dollars(users['yearly_income']).to_numpy()
+    cards['credit_limit_text'] = dollars(cards['credit_limit']).to_numpy()
+
+    sizes = np.diff(np.linspace(0, rows, shards + 1).astype(np.int64))
+    for i, size in enumerate(sizes):
+        shard_start = START_DATE + pd.Timedelta(days=i * days_per_shard)
+        shard = make_shard(users, cards, int(size), shard_start, shard_start + pd.Timedelta(days=days_per_shard),
+                           np.random.default_rng([seed, i]))
+        shard.to_csv(os.path.join(out, f"merged_data_part{i + 1}.csv"), index=False)
+
+    users[['user_id', 'prediction_rf']].to_csv(os.path.join(out, PREDICTIONS_NAME), index=False)
+    manifest = {"params": params, "users": len(users), "cards": len(cards),
+                "seconds": round(time.perf_counter() - start, 2)}
+    with open(manifest_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sentetik işlem shard'ları üretir")
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--shards", type=int, default=10)
+    parser.add_argument("--txns-per-user", type=int, default=500)
+    parser.add_argument("--days-per-shard", type=int, default=365)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", required=True)
+    args = parser.parse_args()
+
+    manifest = generate(args.out, args.rows, args.shards, args.txns_per_user, args.days_per_shard, args.seed)
+    print(f"{args.rows:,} satır, {manifest['users']:,} kullanıcı, {manifest['cards']:,} kart -> {args.out} "
+          f"({manifest['seconds']:.1f}s)")
+
+
+if __name__ == "__main__":
+    main()
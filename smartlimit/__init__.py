@@ -0,0 +1 @@
+"""SmartLimit veri katmanı (Streamlit'ten bağımsız yardımcı modüller)."""
@@ -0,0 +1,330 @@
+# --- BİRLEŞTİRİLEBİLİR AGREGALAR ---
+# Every KPI and chart of the dashboard can be rebuilt from a small table of sums
+# and counts grouped by month x card_brand x gender x segment_label. Tables built
+# from different chunks/shards merge by adding them up, so the full transaction
+# frame never has to be in memory at once.
+#
+# Months are int32 keys (months since 1970-01), derived once when a chunk is
+# cleaned. The cube is kept sorted by month, so a date range is a searchsorted
+# slice, and the per-month totals behind the monthly trend and period-over-period
+# KPIs are computed once per cube and read by key.
+
+import numpy as np
+import pandas as pd
+
+from smartlimit.cache import get_frame_cache
+from smartlimit.instrumentation import stage
+
+GROUP_KEYS = ['txn_month', 'card_brand', 'gender', 'segment_label']
+MEASURES = ['amount', 'credit_limit', 'total_debt', 'yearly_income', 'prediction_rf']
+# Stand-in for a missing key so that merged tables never contain NaN keys
+MISSING = '(bilinmiyor)'
+
+
+def month_key(dates):
+    """int32 month key (months since 1970-01) of datetime values without NaT."""
+    values = np.asarray(dates, dtype='datetime64[ns]')
+    return values.astype('datetime64[M]').astype('int64').astype(np.int32)
+
+
+def month_start(keys):
+    """First day of the month of each month key, as datetime64[ns]."""
+    return np.asarray(keys, dtype='int64').astype('datetime64[M]').astype('datetime64[ns]')
+
+
+def month_of(dates):
+    # Same result as dates.dt.to_period("M").dt.to_timestamp(), without Period objects
+    return pd.Series(month_start(month_key(dates)), index=dates.index, name=dates.name)
+
+
+def _empty_cube():
+    columns = ['rows'] + [f'{m}_{stat}' for m in MEASURES for stat in ('sum', 'count')]
+    return pd.DataFrame(columns=GROUP_KEYS + columns).astype({'txn_month': np.int32, **{c: 'float64' for c in columns}})
+
+
+def sort_by_month(cube):
+    return cube.sort_values('txn_month', kind='stable', ignore_index=True)
+
+
+def _empty_customers():
+    return pd.DataFrame({'user_id': pd.Series(dtype='int64'), 'txn_month': pd.Series(dtype=np.int32),
+                         **{key: pd.Series(dtype=object) for key in GROUP_KEYS[1:]}})
+
+
+def _customer_keys(df, keys):
+    """Distinct (user_id, month, card_brand, gender, segment_label) of the rows in ``keys``."""
+    if 'user_id' not in df.columns or 'segment_label' not in df.columns:
+        return _empty_customers()
+    index = keys['txn_month'].index
+    table = pd.DataFrame({'user_id': df.loc[index, 'user_id'], **{key: keys[key] for key in GROUP_KEYS}})
+    table = table.dropna(subset=['user_id', 'segment_label']).drop_duplicates(ignore_index=True)
+    customers = pd.DataFrame({'user_id': table['user_id'].astype('int64').to_numpy(),
+                              'txn_month': table['txn_month'].to_numpy(dtype=np.int32)})
+    for key in GROUP_KEYS[1:]:
+        customers[key] = table[key].where(table[key].notna(), MISSING).to_numpy()
+    return customers.astype({key: object for key in GROUP_KEYS[1:]})
+
+
+class TransactionAggregates:
+    """``cube``: one row per key combination with ``rows``, ``<measure>_sum`` and
+    ``<measure>_count``; ``users``: prediction_rf per user_id seen;
+    ``customers``: the distinct (user_id, month, card_brand, gender, segment_label)
+    combinations seen, so the customers behind any filter can be found."""
+
+    def __init__(self, cube=None, users=None, customers=None):
+        self.cube = _empty_cube() if cube is None else cube
+        self._month_totals = None
+        self.users = pd.Series(dtype='float64', name='prediction_rf') if users is None else users
+        self.customers = _empty_customers() if customers is None else customers
+
+    @classmethod
+    def from_frame(cls, df):
+        if df.empty or 'txn_date' not in df.columns:
+            return cls()
+        with stage("build_cube", rows_in=len(df)) as s:
+            aggregates = cls._from_frame(df)
+            s.rows_out = len(aggregates.cube)
+        return aggregates
+
+    @classmethod
+    def _from_frame(cls, df):
+        valid = df['txn_date'].notna()
+        if 'txn_month' in df.columns: # Derived at ingestion by clean_transactions
+            months = df.loc[valid, 'txn_month'].astype(np.int32)
+        else:
+            months = pd.Series(month_key(df.loc[valid, 'txn_date']), index=df.index[valid])
+        keys = {'txn_month': months.rename('txn_month')}
+        for key in GROUP_KEYS[1:]:
+            keys[key] = df.loc[valid, key] if key in df.columns else pd.Series(MISSING, index=keys['txn_month'].index)
+        measures = pd.DataFrame({
+            m: pd.to_numeric(df.loc[valid, m], errors='coerce').astype('float64') if m in df.columns
+            else pd.Series(np.nan, index=keys['txn_month'].index)
+            for m in MEASURES
+        })
+        grouped = measures.groupby([keys[k] for k in GROUP_KEYS], dropna=False, observed=True, sort=False)
+        cube = grouped.agg(['sum', 'count'])
+        cube.columns = [f'{m}_{stat}' for m, stat in cube.columns]
+        cube.insert(0, 'rows', grouped.size().astype('float64'))
+        cube = cube.reset_index()
+        cube.columns = GROUP_KEYS + list(cube.columns[len(GROUP_KEYS):])
+        for key in GROUP_KEYS[1:]:
+            cube[key] = cube[key].astype(object).where(cube[key].notna(), MISSING)
+        cube = sort_by_month(cube)
+
+        users = pd.Series(dtype='float64', name='prediction_rf')
+        if 'user_id' in df.columns and 'prediction_rf' in df.columns:
+            pairs = df[['user_id', 'prediction_rf']].dropna().drop_duplicates('user_id')
+            users = pd.Series(pd.to_numeric(pairs['prediction_rf'], errors='coerce').to_numpy(dtype='float64'),
+                              index=pairs['user_id'].astype('int64').to_numpy(), name='prediction_rf')
+        return cls(cube, users, _customer_keys(df, keys))
+
+    def merge(self, other):
+        if self.empty:
+            return other
+        if other.empty:
+            return self
+        cube = pd.concat([self.cube, other.cube], ignore_index=True)
+        cube = sort_by_month(cube.groupby(GROUP_KEYS, sort=False).sum().reset_index())
+        users = self.users.combine_first(other.users)
+        customers = pd.concat([self.customers, other.customers], ignore_index=True).drop_duplicates(ignore_index=True)
+        return TransactionAggregates(cube, users, customers)
+
+    __add__ = merge
+
+    def store(self, key, directory=None):
+        get_frame_cache('cube', directory).store(key, self.cube)
+        users = self.users.rename_axis('user_id').rename('prediction_rf').reset_index()
+        get_frame_cache('users', directory).store(key, users)
+        get_frame_cache('customers', directory).store(key, self.customers)
+
+    @classmethod
+    def load(cls, key, directory=None):
+        """Aggregates persisted under ``key`` by :meth:`store`, or ``None``."""
+        cube = get_frame_cache('cube', directory).load(key)
+        users = get_frame_cache('users', directory).load(key)
+        customers = get_frame_cache('customers', directory).load(key)
+        if cube is None or users is None or customers is None:
+            return None
+        customers['txn_month'] = customers['txn_month'].astype(np.int32)
+        for group_key in GROUP_KEYS[1:]:
+            customers[group_key] = customers[group_key].astype(object)
+        return cls(cube, pd.Series(users['prediction_rf'].to_numpy(), index=users['user_id'].to_numpy(),
+                                   name='prediction_rf'), customers)
+
+    @classmethod
+    def build_once(cls, key, build, directory=None):
+        """Stored aggregates for ``key``, or ``build()`` run by one process at a time
+        (the shared cache backend locks across workers, see ``cache.build_once``)."""
+        cached = cls.load(key, directory)
+        if cached is not None:
+            return cached
+        with get_frame_cache('cube', directory).lock(key):
+            cached = cls.load(key, directory) # Built by another worker while we were waiting
+            if cached is not None:
+                return cached
+            aggregates = build()
+            if not aggregates.empty:
+                aggregates.store(key, directory)
+        return aggregates
+
+    def filter(self, filters):
+        """Aggregates of the transactions matching ``filters`` (:class:`~smartlimit.filters.Filters`).
+
+        Only the cube and the customer keys are sliced (whole months for date
+        ranges), never a transaction frame; per-user predictions keep the users
+        with at least one matching transaction.
+        """
+        if filters is None or not filters.active:
+            return self
+        with stage("filter", rows_in=len(self.cube)) as s:
+            # Month partition pruning: the cube is sorted by month key
+            first, last = filters.month_bounds()
+            months = self.cube['txn_month'].to_numpy()
+            cube = self.cube.iloc[np.searchsorted(months, first, 'left') if first is not None else 0:
+                                  np.searchsorted(months, last, 'right') if last is not None else len(months)]
+            cube = cube[filters.cube_mask(cube)].reset_index(drop=True)
+            customers = self.customers
+            mask = filters.cube_mask(customers)
+            if first is not None:
+                mask &= customers['txn_month'] >= first
+            if last is not None:
+                mask &= customers['txn_month'] <= last
+            customers = customers[mask].reset_index(drop=True)
+            users = self.users[self.users.index.isin(customers['user_id'])]
+            s.rows_out = len(cube)
+        return TransactionAggregates(cube, users, customers)
+
+    def filter_options(self):
+        """First/last month and the values of every filterable key, for filter widgets."""
+        months = (None, None)
+        if not self.cube.empty:
+            keys = self.cube['txn_month']
+            months = tuple(pd.Timestamp(m) for m in month_start([keys.min(), keys.max()]))
+        options = {'months': months}
+        for key in GROUP_KEYS[1:]:
+            options[key] = sorted(v for v in self.cube[key].unique() if v != MISSING)
+        return options
+
+    @property
+    def empty(self):
+        return self.cube.empty
+
+    # --- Türetilen tablolar ---
+
+    def _total(self, column):
+        return float(self.cube[column].sum())
+
+    def _mean(self, measure):
+        count = self._total(f'{measure}_count')
+        return self._total(f'{measure}_sum') / count if count else np.nan
+
+    def _by(self, key, columns):
+        cube = self.cube[self.cube[key] != MISSING]
+        return cube.groupby(key, sort=True)[columns].sum()
+
+    def _mean_by(self, key, measure):
+        table = self._by(key, [f'{measure}_sum', f'{measure}_count'])
+        mean = table[f'{measure}_sum'] / table[f'{measure}_count'].replace(0, np.nan)
+        return mean.rename(measure).reset_index()
+
+    def _sum_by(self, key, measure):
+        return self._by(key, [f'{measure}_sum'])[f'{measure}_sum'].rename(measure).reset_index()
+
+    def month_totals(self):
+        """Every measure's sum/count per month key (sorted), computed once per cube."""
+        if self._month_totals is None:
+            self._month_totals = self.cube.drop(columns=GROUP_KEYS[1:]).groupby('txn_month', sort=True).sum()
+        return self._month_totals
+
+    def monthly(self, measure='amount'):
+        totals = self.month_totals()[[f'{measure}_sum', f'{measure}_count']]
+        return totals.set_axis(pd.DatetimeIndex(month_start(totals.index), name='txn_month'))
+
+    def monthly_mean(self, measure):
+        totals = self.month_totals()
+        return totals[f'{measure}_sum'] / totals[f'{measure}_count'].replace(0, np.nan)
+
+    def change_pct(self, measure='credit_limit', months=1):
+        """% change of the monthly mean of ``measure`` from ``months`` before the
+        latest month to the latest month (0.0 when either is missing)."""
+        means = self.monthly_mean(measure)
+        if means.empty:
+            return 0.0
+        current_month = means.index[-1]
+        current, previous = means.iloc[-1], means.get(current_month - months, np.nan)
+        if pd.notna(previous) and previous != 0:
+            return ((current - previous) / previous) * 100
+        return 0.0
+
+    def eda_preview(self):
+        """Same keys and shapes as ``create_eda_dashboard_preview``."""
+        with stage("eda_preview", rows_in=len(self.cube)) as s:
+            preview = self._eda_preview()
+            s.rows_out = len(preview["aylik_harcama_df"])
+        return preview
+
+    def _eda_preview(self):
+        return {
+            "toplam_musteri": int(self.cube.loc[self.cube['card_brand'] != MISSING, 'rows'].sum()),
+            "ort_kredi_limiti": self._mean('credit_limit'),
+            "ort_gelir": self._mean('yearly_income'),
+            "ort_borc": self._mean('total_debt'),
+            "aylik_harcama_df": self.monthly('amount')['amount_sum'].rename('amount').reset_index(),
+            "kart_limiti_df": self._mean_by('card_brand', 'credit_limit'),
+            "borc_cinsiyet_df": self._mean_by('gender', 'total_debt'),
+        }
+
+    def mtd_change_pct(self):
+        # Average credit limit of the latest month vs the month before
+        return self.change_pct('credit_limit', months=1)
+
+    def segment_prediction(self):
+        # Users without a prediction count with the overall mean, matching the
+        # fillna(mean) applied on the transaction frame
+        overall = self._mean('prediction_rf')
+        table = self._by('segment_label', ['rows', 'prediction_rf_sum', 'prediction_rf_count'])
+        if pd.isna(overall):
+            table = table[table['prediction_rf_count'] > 0]
+            overall = 0.0
+        filled = table['prediction_rf_sum'] + (table['rows'] - table['prediction_rf_count']) * overall
+        return (filled / table['rows']).rename('avg_prediction_rf').reset_index()
+
+    def advanced_kpis(self, predictions=None):
+        """Same keys and shapes as ``generate_advanced_kpi_and_charts``.
+
+        With a :class:`~smartlimit.predictions.PredictionStore`, ``user_prediction_df``
+        is its per-user table instead of the users seen in the transactions.
+        """
+        with stage("advanced_kpis", rows_in=len(self.cube)) as s:
+            kpis = self._advanced_kpis(predictions)
+            s.rows_out = len(kpis["user_prediction_df"])
+        return kpis
+
+    def _advanced_kpis(self, predictions=None):
+        users = self.users.sort_index()
+        if predictions is not None and not predictions.empty:
+            user_prediction_df = predictions.table()
+        else:
+            user_prediction_df = pd.DataFrame({'user_id': users.index, 'prediction_rf': users.to_numpy()})
+        return {
+            "mtd_change_pct": round(self.mtd_change_pct(), 2),
+            "card_spending_df": self._sum_by('card_brand', 'amount'),
+            "gender_limit_df": self._mean_by('gender', 'credit_limit'),
+            "user_prediction_df": user_prediction_df,
+            "segment_prediction_df": self.segment_prediction(),
+        }
+
+    def segment_metrics(self):
+        """Mean credit_limit / total_debt / amount per segment, like the segmentation page groupby."""
+        metrics = self._mean_by('segment_label', 'credit_limit')
+        for measure in ['total_debt', 'amount']:
+            metrics[measure] = self._mean_by('segment_label', measure)[measure].to_numpy()
+        return metrics
+
+    def segment_counts(self, customers=False):
+        """Transactions per segment, or with ``customers=True`` distinct customers per segment."""
+        if customers:
+            pairs = self.customers.drop_duplicates(['user_id', 'segment_label'])
+            return pairs['segment_label'].value_counts().rename_axis('segment_label').rename('rows')
+        counts = self._by('segment_label', ['rows'])['rows'].astype('int64')
+        return counts[counts > 0].sort_values(ascending=False)
@@ -0,0 +1,166 @@
+# --- TOPLU (HEADLESS) ÜRETİM ---
+# python -m smartlimit.batch [--source DIR|GLOB] [--predictions CSV] [--cache-dir DIR]
+#                            [--workers N] [--executor process|thread] [--threads N]
+#                            [--export DIR] [--metrics FILE]
+# Builds every data product of the dashboard outside Streamlit, e.g. from cron:
+# the cleaned, segmented frame and the aggregate cube go into the cache under the
+# same data-version key the app computes, and <cache dir>/latest.json points at
+# them. With SMARTLIMIT_PIPELINE_MODE=precomputed the app only reads that entry,
+# so no loading, cleaning or K-Means ever runs on the request path.
+
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+from dataclasses import replace
+from datetime import datetime, timezone
+
+from smartlimit import instrumentation
+from smartlimit.aggregates import TransactionAggregates
+from smartlimit.cache import CACHE_DIR_ENV_VAR, DEFAULT_CACHE_DIR, atomic_write, dataset_fingerprint, get_frame_cache
+from smartlimit.pipeline import PIPELINE_PARAMS, build_frame
+from smartlimit.predictions import PredictionStore
+from smartlimit.segment_model import stored_model
+from smartlimit.segmentation import SegmentationConfig
+from smartlimit.sources import SOURCE_ENV_VAR, ShardSource, resolve_prediction_location
+
+logger = logging.getLogger(__name__)
+
+LATEST_NAME = "latest.json"
+
+
+def dataset_key(source, prediction_location, params=PIPELINE_PARAMS, config=SegmentationConfig()):
+    """Data-version key of the cleaned frame and its aggregates: shards, prediction
+    file, pipeline parameters and the stored segmentation model (``None`` if a
+    location cannot be fingerprinted).
+
+    The model is read from disk even when a refit is requested, so a key taken
+    after a build names the centroids that build fitted, not ``None``.
+    """
+    model = stored_model(params, config)
+    cache_params = {**params, "segmentation": config.cache_params(),
+                    "model": model.model_id if model is not None else None}
+    return dataset_fingerprint(source, prediction_location, cache_params)
+
+
+def latest_path(directory=None):
+    return os.path.join(directory or os.environ.get(CACHE_DIR_ENV_VAR, DEFAULT_CACHE_DIR), LATEST_NAME)
+
+
+def read_latest(directory=None):
+    """The pointer written by the last successful batch run, or ``None``."""
+    try:
+        with open(latest_path(directory), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def write_latest(info, directory=None):
+    path = latest_path(directory)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with atomic_write(path) as tmp_path, open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(info, f, ensure_ascii=False, indent=2)
+    return path
+
+
+class BatchError(Exception):
+    """The build is incomplete; nothing was published."""
+
+
+def run_batch(source=None, prediction_location=None, params=PIPELINE_PARAMS, config=SegmentationConfig(),
+              max_workers=None, executor="process", export_dir=None):
+    """Build, cache and publish the frame and aggregates; returns the ``latest.json`` content.
+
+    A failed shard or missing predictions raise :class:`BatchError` instead of
+    publishing a partial data version.
+    """
+    start = time.perf_counter()
+    source = source or ShardSource.from_spec()
+    prediction_location = resolve_prediction_location(prediction_location)
+    with instrumentation.run("batch"):
+        try:
+            predictions = PredictionStore.read_csv(prediction_location)
+        except Exception as e:
+            raise BatchError(f"Error loading prediction data: {e}") from e
+        build = build_frame(source, predictions, params, config, max_workers=max_workers, executor=executor)
+        for level, message in build.messages:
+            logger.log(logging.ERROR if level == "error" else logging.WARNING, message)
+        if build.df.empty or not build.complete:
+            raise BatchError("Incomplete build (see the messages above); the previous data version stays published")
+
+        # After the build, so a model fitted by it is part of the key
+        key = dataset_key(source, prediction_location, params, config)
+        if key is None:
+            raise BatchError("The data sources could not be fingerprinted; nothing was published")
+        with instrumentation.stage("store_frame", rows_in=len(build.df)):
+            frame_path = get_frame_cache().store(key, build.df)
+        aggregates = TransactionAggregates.from_frame(build.df)
+        with instrumentation.stage("store_aggregates", rows_in=len(aggregates.cube)):
+            aggregates.store(key)
+        if frame_path is None:
+            raise BatchError("The cleaned frame could not be written to the cache")
+        if export_dir:
+            export(build.df, aggregates, export_dir, config)
+
+    info = {
+        "key": key,
+        "built_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "rows": len(build.df),
+        "shards": len(source.shards),
+        "segmentation": config.cache_params(),
+        "seconds": round(time.perf_counter() - start, 2),
+        "frame": frame_path,
+    }
+    write_latest(info)
+    logger.info("Published data version %s (%d rows) in %.2fs", key, info["rows"], info["seconds"])
+    return info
+
+
+def export(df, aggregates, directory, config=SegmentationConfig()):
+    """Plain copies of the data products for other consumers (BI tools, notebooks)."""
+    os.makedirs(directory, exist_ok=True)
+    with instrumentation.stage("export"):
+        df.to_parquet(os.path.join(directory, "clean.parquet"), index=False)
+        aggregates.cube.to_parquet(os.path.join(directory, "cube.parquet"), index=False)
+        aggregates.segment_metrics().to_csv(os.path.join(directory, "segment_metrics.csv"), index=False)
+        # Same counting as the app's segment chart: distinct customers at customer level
+        counts = aggregates.segment_counts(customers=config.level == "customer")
+        counts.rename('count').to_csv(os.path.join(directory, "segment_counts.csv"))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="SmartLimit veri ürünlerini Streamlit olmadan üretir")
+    parser.add_argument("--source", help=f"Shard directory, glob or URL prefix (default ${SOURCE_ENV_VAR})")
+    parser.add_argument("--predictions", help="Prediction CSV location")
+    parser.add_argument("--cache-dir", help=f"Cache directory the app reads (default ${CACHE_DIR_ENV_VAR})")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Parallel shard readers")
+    parser.add_argument("--executor", choices=("process", "thread"), default="process")
+    parser.add_argument("--threads", type=int, help="OpenMP/BLAS threads for K-Means (default: every core)")
+    parser.add_argument("--export", help="Also write clean.parquet, cube.parquet and segment CSVs here")
+    parser.add_argument("--metrics", help="Write stage metrics here (.prom = Prometheus text, else JSON)")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(levelname)s %(message)s")
+    if args.cache_dir:
+        os.environ[CACHE_DIR_ENV_VAR] = args.cache_dir # Cache, models and latest.json all live here
+    config = SegmentationConfig.from_env()
+    if args.threads:
+        config = replace(config, n_threads=args.threads)
+    try:
+        info = run_batch(ShardSource.from_spec(args.source), args.predictions, PIPELINE_PARAMS, config,
+                         args.workers, args.executor, args.export)
+    except BatchError as e:
+        logger.error("%s", e)
+        return 1
+    finally:
+        if args.metrics:
+            instrumentation.export_to_file(args.metrics)
+    print(json.dumps(info, ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
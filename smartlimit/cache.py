@@ -0,0 +1,251 @@
+# --- KALICI ÖNBELLEK (PARQUET / ARROW IPC) ---
+# The cleaned + segmented transaction frame is written to disk as Parquet so a
+# restart or redeploy does not have to download, parse, clean and cluster again.
+# Entries are keyed by a fingerprint of the source shards, the prediction file
+# and the pipeline parameters; any change yields a new key, i.e. a cache miss.
+#
+# SMARTLIMIT_CACHE_BACKEND=shared switches to uncompressed Arrow IPC files that
+# every worker process on the host memory-maps, so the OS page cache holds one
+# copy of the data whatever the number of replicas. A per-entry file lock makes
+# one worker build a missing entry while the others wait and then map it.
+
+import contextlib
+import glob
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import requests
+
+try:
+    import fcntl
+except ImportError: # Not available on Windows; entries are then built without a lock
+    fcntl = None
+
+from smartlimit.instrumentation import record
+from smartlimit.sources import is_remote
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR_ENV_VAR = "SMARTLIMIT_CACHE_DIR"
+CACHE_BACKEND_ENV_VAR = "SMARTLIMIT_CACHE_BACKEND"
+LOCK_TIMEOUT_ENV_VAR = "SMARTLIMIT_CACHE_LOCK_TIMEOUT"
+DEFAULT_CACHE_DIR = ".smartlimit_cache"
+DEFAULT_LOCK_TIMEOUT = 900
+ROW_GROUP_ROWS = 131_072
+KEEP_ENTRIES = 3
+
+
+@contextlib.contextmanager
+def atomic_write(path):
+    """Yield a temporary path to write to; it replaces ``path`` once the block succeeds.
+
+    The rename is atomic, so readers (other workers, the app, metric scrapers)
+    never see a half-written file, and a failed write leaves the old one in place.
+    """
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        yield tmp_path
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def fingerprint_location(location, timeout=5):
+    """Cheap change marker for one file: size + mtime locally, HTTP validators remotely.
+
+    Returns ``None`` when the location cannot be fingerprinted, which disables
+    caching for that build instead of risking a stale hit.
+    """
+    if is_remote(location):
+        try:
+            response = requests.head(location, allow_redirects=True, timeout=timeout)
+            response.raise_for_status()
+        except requests.RequestException as e:
+            logger.warning("Cannot fingerprint %s: %s", location, e)
+            return None
+        headers = response.headers
+        validator = headers.get("ETag") or headers.get("Last-Modified")
+        if not validator:
+            return None
+        return f"{validator}|{headers.get('Content-Length', '')}"
+
+    try:
+        stat = os.stat(location)
+    except OSError as e:
+        logger.warning("Cannot fingerprint %s: %s", location, e)
+        return None
+    return f"{stat.st_size}|{stat.st_mtime_ns}"
+
+
+def dataset_fingerprint(source, prediction_location, params):
+    """Hash of every shard, the prediction file and the pipeline parameters."""
+    locations = [shard.location for shard in source.shards] + [prediction_location]
+    with ThreadPoolExecutor(max_workers=min(16, len(locations))) as pool:
+        markers = list(pool.map(fingerprint_location, locations))
+    if not source.shards or any(marker is None for marker in markers):
+        return None
+    payload = {
+        "shards": [[shard.name, marker] for shard, marker in zip(source.shards, markers)],
+        "prediction": markers[-1],
+        "params": params,
+    }
+    blob = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()[:32]
+
+
+class FrameCache:
+    """Directory of ``<prefix>-<key>.parquet`` files written atomically."""
+
+    format = "parquet"
+
+    def __init__(self, directory=None, prefix="clean"):
+        self.directory = directory or os.environ.get(CACHE_DIR_ENV_VAR, DEFAULT_CACHE_DIR)
+        self.prefix = prefix
+
+    def path_for(self, key):
+        return os.path.join(self.directory, f"{self.prefix}-{key}.{self.format}")
+
+    def _read(self, path, filter=None):
+        # Row groups whose txn_date/key statistics cannot match the filter are skipped
+        return pd.read_parquet(path, filters=filter)
+
+    def _write(self, df, path):
+        # Shards are chronological, so smallish row groups cover narrow date ranges
+        df.to_parquet(path, index=False, row_group_size=ROW_GROUP_ROWS)
+
+    @contextlib.contextmanager
+    def lock(self, key):
+        # Per-process cache: concurrent builders just race, the last rename wins
+        yield True
+
+    def load(self, key, filters=None):
+        """Entry ``key``, or ``None``; with :class:`~smartlimit.filters.Filters` only the matching rows."""
+        path = self.path_for(key)
+        if not os.path.exists(path):
+            return None
+        start = time.perf_counter()
+        try:
+            df = self._read(path, filters.expression() if filters is not None else None)
+        except Exception as e:
+            logger.warning("Ignoring unreadable cache file %s: %s", path, e)
+            return None
+        seconds = time.perf_counter() - start
+        logger.info("Cache hit %s (%d rows) in %.2fs", path, len(df), seconds)
+        record(f"cache_read/{self.prefix}", seconds, rows_out=len(df))
+        return df
+
+    def store(self, key, df):
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.path_for(key)
+        try:
+            with atomic_write(path) as tmp_path:
+                self._write(df, tmp_path)
+        except Exception as e:
+            logger.warning("Could not write cache file %s: %s", path, e)
+            return None
+        self._prune(keep=path)
+        logger.info("Cached %d rows to %s", len(df), path)
+        return path
+
+    def _prune(self, keep):
+        # Old data versions are never read again; keep a few for quick rollbacks
+        entries = sorted(glob.glob(os.path.join(self.directory, f"{self.prefix}-*.{self.format}")),
+                         key=os.path.getmtime, reverse=True)
+        for path in entries[KEEP_ENTRIES:]:
+            if path != keep:
+                os.remove(path)
+
+
+class ArrowCache(FrameCache):
+    """Like :class:`FrameCache`, but uncompressed Arrow IPC files read through
+    ``mmap`` and built under a cross-process file lock."""
+
+    format = "arrow"
+
+    def __init__(self, directory=None, prefix="clean", lock_timeout=None):
+        super().__init__(directory, prefix)
+        self.lock_timeout = lock_timeout or int(os.environ.get(LOCK_TIMEOUT_ENV_VAR, DEFAULT_LOCK_TIMEOUT))
+
+    def _read(self, path, filter=None):
+        # Buffers stay in the shared page cache; columns without nulls convert zero-copy
+        with pa.memory_map(path) as source:
+            table = pa.ipc.open_file(source).read_all()
+        if filter is not None:
+            table = table.filter(filter) # Only the matching rows are copied out of the map
+        return table.to_pandas(split_blocks=True)
+
+    def _write(self, df, path):
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        for i, name in enumerate(table.column_names):
+            if df[name].dtype.kind == 'f':
+                # Keep NaN as a float value instead of an Arrow null, so reads stay zero-copy
+                table = table.set_column(i, name, pa.array(np.asarray(df[name])))
+        with pa.OSFile(path, "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+
+    @contextlib.contextmanager
+    def lock(self, key):
+        """Exclusive lock for building ``key``; yields ``False`` if it timed out."""
+        if fcntl is None:
+            yield True
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        with open(f"{self.path_for(key)}.lock", "a+") as lock_file:
+            deadline = time.monotonic() + self.lock_timeout
+            while True:
+                try:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    break
+                except BlockingIOError:
+                    if time.monotonic() > deadline:
+                        logger.warning("Timed out waiting for %s; building without the lock", self.path_for(key))
+                        yield False
+                        return
+                    time.sleep(0.2)
+            try:
+                yield True
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _prune(self, keep):
+        super()._prune(keep)
+        for lock_path in glob.glob(os.path.join(self.directory, f"{self.prefix}-*.{self.format}.lock")):
+            if not os.path.exists(lock_path[:-len(".lock")]) and lock_path != f"{keep}.lock":
+                with contextlib.suppress(OSError):
+                    os.remove(lock_path)
+
+
+def get_frame_cache(prefix="clean", directory=None, backend=None):
+    """``$SMARTLIMIT_CACHE_BACKEND``: ``local`` (Parquet, default) or ``shared`` (Arrow IPC + mmap + lock)."""
+    backend = backend or os.environ.get(CACHE_BACKEND_ENV_VAR, "local")
+    if backend == "shared":
+        return ArrowCache(directory, prefix)
+    return FrameCache(directory, prefix)
+
+
+def build_once(cache, key, build):
+    """Cached entry ``key`` of ``cache``, or ``build()`` run by a single process.
+
+    ``build`` returns ``(df, persist)``; with the shared backend concurrent callers
+    wait for the builder and then read its entry instead of building again.
+    """
+    cached = cache.load(key)
+    if cached is not None:
+        return cached
+    with cache.lock(key):
+        cached = cache.load(key) # Built by another worker while we were waiting
+        if cached is not None:
+            return cached
+        df, persist = build()
+        if persist:
+            cache.store(key, df)
+    return df
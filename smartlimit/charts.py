@@ -0,0 +1,89 @@
+# --- GRAFİK VERİSİ KÜÇÜLTME ---
+# Line charts over one point per customer can still have millions of points.
+# Above a threshold the series is reduced server-side so the websocket payload
+# and the browser render time stay bounded whatever the data size:
+#   minmax - per x bucket keep the rows with the lowest and highest y
+#   lttb   - Largest-Triangle-Three-Buckets, keeps the visual shape
+
+import logging
+import os
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+MAX_POINTS_ENV_VAR = "SMARTLIMIT_CHART_MAX_POINTS"
+DOWNSAMPLE_ENV_VAR = "SMARTLIMIT_CHART_DOWNSAMPLE"
+DEFAULT_MAX_POINTS = 5_000
+DOWNSAMPLE_METHODS = ("minmax", "lttb")
+
+
+def chart_max_points():
+    return int(os.environ.get(MAX_POINTS_ENV_VAR, DEFAULT_MAX_POINTS))
+
+
+def downsample_method():
+    return os.environ.get(DOWNSAMPLE_ENV_VAR, "minmax")
+
+
+def _bucket_edges(n, buckets):
+    return np.linspace(0, n, buckets + 1).astype(np.int64)
+
+
+def minmax_indices(y, max_points):
+    """Positions of the min and max ``y`` in each of ``max_points // 2`` equal-count buckets."""
+    edges = _bucket_edges(len(y), max(1, max_points // 2))
+    bucket_of = np.repeat(np.arange(len(edges) - 1), np.diff(edges))
+    picked = []
+    for reduce in (np.minimum, np.maximum):
+        # Buckets are contiguous, so reduceat finds the extreme; the first row equal to it is kept
+        extreme = reduce.reduceat(y, edges[:-1])
+        positions = np.flatnonzero(y == extreme[bucket_of])
+        _, first = np.unique(bucket_of[positions], return_index=True)
+        picked.append(positions[first])
+    return np.unique(np.concatenate(picked))
+
+
+def lttb_indices(x, y, max_points):
+    """Largest-Triangle-Three-Buckets: first, last and one point per bucket in between."""
+    n = len(y)
+    if max_points < 3:
+        return np.array([0, n - 1]) if n > 1 else np.arange(n)
+    edges = _bucket_edges(n - 2, max_points - 2) + 1
+    selected = np.empty(max_points, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    previous = 0
+    for i in range(max_points - 2):
+        start, end = edges[i], edges[i + 1]
+        # Average of the next bucket (or the last point) is the third triangle vertex
+        next_start, next_end = (edges[i + 1], edges[i + 2]) if i + 2 <= max_points - 2 else (n - 1, n)
+        avg_x, avg_y = x[next_start:next_end].mean(), y[next_start:next_end].mean()
+        area = np.abs((x[previous] - avg_x) * (y[start:end] - y[previous])
+                      - (x[previous] - x[start:end]) * (avg_y - y[previous]))
+        previous = start + int(area.argmax())
+        selected[i + 1] = previous
+    return selected
+
+
+def downsample(df, x, y, max_points=None, method=None):
+    """``df`` (sorted by ``x``) reduced to at most ``max_points`` rows for a line chart.
+
+    Frames at or under the threshold are returned unchanged. Returns
+    ``(frame, downsampled?)``.
+    """
+    max_points = max_points or chart_max_points()
+    method = method or downsample_method()
+    if method not in DOWNSAMPLE_METHODS:
+        raise ValueError(f"Unknown downsample method {method!r}, expected one of {DOWNSAMPLE_METHODS}")
+    if len(df) <= max_points:
+        return df, False
+    df = df.dropna(subset=[x, y]) # Gaps are not drawn anyway
+    if len(df) <= max_points: # Buckets would be empty
+        return df, False
+    y_values = df[y].to_numpy(dtype='float64')
+    if method == "lttb":
+        indices = lttb_indices(df[x].to_numpy(dtype='float64'), y_values, max_points)
+    else:
+        indices = minmax_indices(y_values, max_points)
+    logger.info("Downsampled %s chart from %d to %d points (%s)", y, len(df), len(indices), method)
+    return df.iloc[indices].reset_index(drop=True), True
@@ -0,0 +1,139 @@
+# --- VEKTÖREL TEMİZLEME ---
+# Column-at-a-time replacement for the old per-cell ``clean_currency`` apply:
+# "$" and "," are stripped, blanks and unparseable strings become NaN and
+# numeric values pass through unchanged.
+
+import logging
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+logger = logging.getLogger(__name__)
+
+
+# Byte classes for _plain_rows: digits 0, "." 1, a sign 16 and anything else
+# 128, so a row's sum tells its dots, its signs and whether it has other bytes.
+_BYTE_CLASS = np.full(256, 128, dtype=np.uint8)
+_BYTE_CLASS[ord("0"):ord("9") + 1] = 0
+_BYTE_CLASS[ord(".")] = 1
+_BYTE_CLASS[[ord("+"), ord("-")]] = 16
+# reduceat casts its input to the sum dtype, so it runs on this many rows at a time
+_BLOCK_ROWS = 8_192
+
+
+def _buffers(text):
+    """Offsets (from 0) and UTF-8 bytes of a ``pa.string()`` array with offset 0."""
+    offsets = np.frombuffer(text.buffers()[1], dtype=np.int32)[:len(text) + 1]
+    data = text.buffers()[2]
+    data = np.frombuffer(data, dtype=np.uint8) if data is not None else np.empty(0, np.uint8)
+    data = data[offsets[0]:offsets[-1]]
+    return (offsets - offsets[0] if offsets[0] else offsets), data
+
+
+def _row_sums(data, offsets, table):
+    # Per-row sums of table[byte]. reduceat cannot express empty rows: trailing
+    # ones are left out, the others zeroed afterwards.
+    sums = np.zeros(len(offsets) - 1, dtype=np.int32)
+    for start in range(0, len(sums), _BLOCK_ROWS):
+        stop = min(start + _BLOCK_ROWS, len(sums))
+        lo, hi = offsets[start], offsets[stop]
+        starts = offsets[start:stop] - lo
+        rows = np.searchsorted(starts, hi - lo) # Rows that start before the block's end
+        if rows:
+            sums[start:start + rows] = np.add.reduceat(table[data[lo:hi]], starts[:rows], dtype=np.int32)
+    sums[offsets[1:] == offsets[:-1]] = 0
+    return sums
+
+
+def _plain_rows(text):
+    """Rows made of digits with at most one "." and an optional leading sign:
+    Arrow's float cast parses them exactly as float() would."""
+    offsets, data = _buffers(text)
+    sums = _row_sums(data, offsets, _BYTE_CLASS)
+    plain = (sums & ~17) == 0 # 0, 1, 16 or 17: at most one "." and one sign
+    digits = np.diff(offsets)
+    digits -= sums & 1
+    digits -= sums >> 4
+    plain &= digits > 0
+    signed = np.flatnonzero(plain & (sums >= 16))
+    plain[signed] = _BYTE_CLASS[data[offsets[signed]]] == 16
+    if text.null_count:
+        plain &= text.is_valid().to_numpy(zero_copy_only=False)
+    return plain
+
+
+def _parse_leftovers(values):
+    # Whitespace, exponents, "1_000", "inf" and words are left to Python's
+    # float(), as the legacy helper did; only those cells go through it.
+    def parse(text):
+        try:
+            return float(text)
+        except ValueError:
+            return np.nan
+    return np.array([parse(text) for text in values], dtype="float64")
+
+
+def _parse_failed(text):
+    # The column cast failed: plain numbers are still cast by Arrow in one go,
+    # only the other rows go through Python.
+    plain = _plain_rows(text)
+    result = np.full(len(text), np.nan)
+    result[plain] = pc.cast(text.filter(pa.array(plain)), pa.float64()).to_numpy(zero_copy_only=False)
+    failed = np.flatnonzero(~plain & text.is_valid().to_numpy(zero_copy_only=False))
+    if len(failed):
+        result[failed] = _parse_leftovers(text.take(failed).to_pylist())
+    return result
+
+
+def _as_text(value):
+    # Non-string cells were passed through by the legacy helper and then cast
+    # with astype(float): True -> "1.0", 7 -> "7.0". Numbers round-trip exactly.
+    if isinstance(value, str):
+        return value
+    if value is None or value is pd.NA or value != value:
+        return None
+    try:
+        return repr(float(value))
+    except (TypeError, ValueError):
+        return repr(value)
+
+
+def clean_currency_column(series):
+    """Return ``(float64 series, coerced)`` where ``coerced`` counts non-missing
+    inputs that ended up NaN (blank or unparseable strings)."""
+    if pd.api.types.is_numeric_dtype(series) or pd.api.types.is_bool_dtype(series):
+        # Bools become 1.0/0.0, as the legacy astype(float) made them
+        return series.astype("float64"), 0
+
+    try:
+        text = pa.array(series, type=pa.string(), from_pandas=True)
+    except (pa.ArrowTypeError, pa.ArrowInvalid):
+        text = pa.array([_as_text(v) for v in series], type=pa.string(), from_pandas=True)
+    if isinstance(text, pa.ChunkedArray): # Arrow-backed columns
+        text = text.combine_chunks()
+    missing = text.null_count
+    text = pc.replace_substring(text, "$", "")
+    text = pc.replace_substring(text, ",", "")
+    text = pc.if_else(pc.equal(text, ""), pa.scalar(None, pa.string()), text)
+
+    try:
+        result = pc.cast(text, pa.float64()).to_numpy(zero_copy_only=False)
+    except pa.ArrowInvalid:
+        result = _parse_failed(text)
+
+    coerced = int(np.isnan(result).sum()) - missing
+    return pd.Series(result, index=series.index, name=series.name), coerced
+
+
+def clean_currency_columns(df, columns):
+    """Clean ``columns`` of ``df`` in place; returns ``{column: coerced count}``."""
+    coerced = {}
+    for col in columns:
+        if col not in df.columns:
+            continue
+        df[col], coerced[col] = clean_currency_column(df[col])
+    if any(coerced.values()):
+        logger.info("Currency cleaning coerced values to NaN: %s", coerced)
+    return coerced
@@ -0,0 +1,226 @@
+# --- SORGU MOTORLARI ---
+# Dashboard aggregations behind one interface. ``PandasEngine`` runs them as
+# groupbys on the in-memory frame (the fallback); ``DuckDBEngine`` runs the same
+# queries as SQL in an embedded DuckDB database, multi-threaded and able to
+# spill to disk, over either a DataFrame or the Parquet cache file directly.
+
+import logging
+import os
+
+import numpy as np
+import pandas as pd
+
+from smartlimit.aggregates import GROUP_KEYS, MEASURES, MISSING, TransactionAggregates, month_of, sort_by_month
+from smartlimit.cache import CACHE_DIR_ENV_VAR, DEFAULT_CACHE_DIR
+
+logger = logging.getLogger(__name__)
+
+ENGINE_ENV_VAR = "SMARTLIMIT_ENGINE"
+DUCKDB_THREADS_ENV_VAR = "SMARTLIMIT_DUCKDB_THREADS"
+DUCKDB_MEMORY_ENV_VAR = "SMARTLIMIT_DUCKDB_MEMORY_LIMIT"
+
+
+def _sql_string(value):
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def _mtd_change_pct(current_avg_limit, previous_avg_limit):
+    if pd.notna(previous_avg_limit) and previous_avg_limit != 0:
+        return float((current_avg_limit - previous_avg_limit) / previous_avg_limit * 100)
+    return 0.0
+
+
+class PandasEngine:
+    name = "pandas"
+
+    def __init__(self, frame):
+        self.frame = frame
+
+    def _numeric(self, columns):
+        # float32 storage columns are aggregated in float64, like the SQL engine does
+        return self.frame[columns].astype('float64')
+
+    def segment_metrics(self):
+        measures = self._numeric(['credit_limit', 'total_debt', 'amount'])
+        return measures.groupby(self.frame['segment_label'], observed=True).mean().reset_index()
+
+    def segment_counts(self):
+        counts = self.frame['segment_label'].value_counts()
+        return counts[counts > 0]
+
+    def monthly_spend(self):
+        dated = self.frame['txn_date'].notna()
+        amount = self._numeric('amount')[dated]
+        return amount.groupby(month_of(self.frame.loc[dated, 'txn_date']).rename('txn_month')).sum().reset_index()
+
+    def _by(self, key, measure, func):
+        return self._numeric(measure).groupby(self.frame[key], observed=True).agg(func).reset_index()
+
+    def card_limit(self):
+        return self._by('card_brand', 'credit_limit', 'mean')
+
+    def gender_debt(self):
+        return self._by('gender', 'total_debt', 'mean')
+
+    def gender_limit(self):
+        return self._by('gender', 'credit_limit', 'mean')
+
+    def card_spending(self):
+        return self._by('card_brand', 'amount', 'sum')
+
+    def mtd_change_pct(self):
+        dated = self.frame['txn_date'].notna()
+        if not dated.any():
+            return 0.0
+        limits = self._numeric('credit_limit')[dated]
+        avg_limit = limits.groupby(month_of(self.frame.loc[dated, 'txn_date'])).mean()
+        current_month = avg_limit.index.max()
+        return _mtd_change_pct(avg_limit.get(current_month, np.nan),
+                               avg_limit.get(current_month - pd.DateOffset(months=1), np.nan))
+
+    def aggregates(self):
+        return TransactionAggregates.from_frame(self.frame)
+
+
+class DuckDBEngine:
+    """SQL over ``frame`` (registered zero-copy) or ``parquet_path`` (scanned out of core)."""
+
+    name = "duckdb"
+
+    def __init__(self, frame=None, parquet_path=None, threads=None, memory_limit=None, temp_directory=None):
+        import duckdb # Optional: only needed when this engine is selected
+
+        if (frame is None) == (parquet_path is None):
+            raise ValueError("Pass exactly one of frame or parquet_path")
+        threads = threads or int(os.environ.get(DUCKDB_THREADS_ENV_VAR, 0)) or os.cpu_count() or 1
+        memory_limit = memory_limit or os.environ.get(DUCKDB_MEMORY_ENV_VAR)
+        temp_directory = temp_directory or os.path.join(
+            os.environ.get(CACHE_DIR_ENV_VAR, DEFAULT_CACHE_DIR), "duckdb_tmp")
+
+        self.con = duckdb.connect()
+        self.con.execute(f"SET threads = {int(threads)}")
+        self.con.execute(f"SET temp_directory = {_sql_string(temp_directory)}") # Spill target for large groupbys
+        if memory_limit:
+            self.con.execute(f"SET memory_limit = {_sql_string(memory_limit)}")
+        if frame is not None:
+            self.con.register("transactions", frame)
+        else:
+            self.con.execute(f"CREATE VIEW transactions AS SELECT * FROM read_parquet({_sql_string(parquet_path)})")
+        self.columns = {row[0] for row in self.con.execute("DESCRIBE transactions").fetchall()}
+
+    def query(self, sql, params=None):
+        return self.con.execute(sql, params or []).df()
+
+    def segment_metrics(self):
+        return self.query("""
+            SELECT CAST(segment_label AS VARCHAR) AS segment_label,
+                   avg(credit_limit) AS credit_limit, avg(total_debt) AS total_debt, avg(amount) AS amount
+            FROM transactions WHERE segment_label IS NOT NULL
+            GROUP BY 1 ORDER BY 1
+        """)
+
+    def segment_counts(self):
+        counts = self.query("""
+            SELECT CAST(segment_label AS VARCHAR) AS segment_label, count(*) AS count
+            FROM transactions WHERE segment_label IS NOT NULL
+            GROUP BY 1 ORDER BY 2 DESC, 1
+        """)
+        return counts.set_index('segment_label')['count']
+
+    def monthly_spend(self):
+        return self.query("""
+            SELECT date_trunc('month', txn_date) AS txn_month, coalesce(sum(amount), 0) AS amount
+            FROM transactions WHERE txn_date IS NOT NULL
+            GROUP BY 1 ORDER BY 1
+        """)
+
+    def _by(self, key, measure, aggregate):
+        return self.query(f"""
+            SELECT CAST({key} AS VARCHAR) AS {key}, {aggregate.format(measure)} AS {measure}
+            FROM transactions WHERE {key} IS NOT NULL
+            GROUP BY 1 ORDER BY 1
+        """)
+
+    def card_limit(self):
+        return self._by('card_brand', 'credit_limit', 'avg({})')
+
+    def gender_debt(self):
+        return self._by('gender', 'total_debt', 'avg({})')
+
+    def gender_limit(self):
+        return self._by('gender', 'credit_limit', 'avg({})')
+
+    def card_spending(self):
+        return self._by('card_brand', 'amount', 'coalesce(sum({}), 0)')
+
+    def mtd_change_pct(self):
+        row = self.con.execute("""
+            WITH monthly AS (
+                SELECT date_trunc('month', txn_date) AS txn_month, avg(credit_limit) AS avg_limit
+                FROM transactions WHERE txn_date IS NOT NULL GROUP BY 1
+            ), latest AS (SELECT max(txn_month) AS txn_month FROM monthly)
+            SELECT (SELECT avg_limit FROM monthly JOIN latest USING (txn_month)),
+                   (SELECT avg_limit FROM monthly, latest
+                    WHERE monthly.txn_month = latest.txn_month - INTERVAL 1 MONTH)
+        """).fetchone()
+        if row is None or row[0] is None:
+            return 0.0
+        return _mtd_change_pct(row[0], np.nan if row[1] is None else row[1])
+
+    def aggregates(self):
+        """The same cube as ``TransactionAggregates.from_frame``, grouped in SQL."""
+        keys = ["CAST((year(txn_date) - 1970) * 12 + month(txn_date) - 1 AS INTEGER) AS txn_month"] + [
+            f"coalesce(CAST({key} AS VARCHAR), '{MISSING}') AS {key}" if key in self.columns
+            else f"'{MISSING}' AS {key}"
+            for key in GROUP_KEYS[1:]
+        ]
+        measures = ["CAST(count(*) AS DOUBLE) AS rows"]
+        for m in MEASURES:
+            column = f"CAST({m} AS DOUBLE)" if m in self.columns else "CAST(NULL AS DOUBLE)"
+            measures += [f"coalesce(sum({column}), 0) AS {m}_sum", f"CAST(count({column}) AS DOUBLE) AS {m}_count"]
+        cube = self.query(f"""
+            SELECT {', '.join(keys)}, {', '.join(measures)}
+            FROM transactions WHERE txn_date IS NOT NULL
+            GROUP BY ALL
+        """)
+        cube['txn_month'] = cube['txn_month'].astype(np.int32)
+        for key in GROUP_KEYS[1:]:
+            cube[key] = cube[key].astype(object)
+        cube = sort_by_month(cube)
+
+        users = pd.Series(dtype='float64', name='prediction_rf')
+        if {'user_id', 'prediction_rf'} <= self.columns:
+            pairs = self.query("""
+                SELECT CAST(user_id AS BIGINT) AS user_id, CAST(any_value(prediction_rf) AS DOUBLE) AS prediction_rf
+                FROM transactions WHERE user_id IS NOT NULL AND prediction_rf IS NOT NULL
+                GROUP BY 1
+            """)
+            users = pd.Series(pairs['prediction_rf'].to_numpy(), index=pairs['user_id'].to_numpy(), name='prediction_rf')
+
+        customers = None
+        if {'user_id', 'segment_label'} <= self.columns:
+            customers = self.query(f"""
+                SELECT DISTINCT CAST(user_id AS BIGINT) AS user_id, {', '.join(keys)}
+                FROM transactions
+                WHERE txn_date IS NOT NULL AND user_id IS NOT NULL AND segment_label IS NOT NULL
+            """)
+            customers['txn_month'] = customers['txn_month'].astype(np.int32)
+            for key in GROUP_KEYS[1:]:
+                customers[key] = customers[key].astype(object)
+        return TransactionAggregates(cube, users, customers)
+
+
+def get_engine(name=None, frame=None, parquet_path=None):
+    """``$SMARTLIMIT_ENGINE`` (``pandas`` by default) over a frame or Parquet file.
+
+    DuckDB failing to start (e.g. not installed) falls back to pandas.
+    """
+    name = name or os.environ.get(ENGINE_ENV_VAR, "pandas")
+    if name == "duckdb":
+        try:
+            return DuckDBEngine(frame=frame, parquet_path=parquet_path)
+        except Exception as e:
+            logger.warning("DuckDB engine unavailable, falling back to pandas: %s", e)
+    if frame is None:
+        frame = pd.read_parquet(parquet_path)
+    return PandasEngine(frame)
@@ -0,0 +1,88 @@
+# --- FİLTRELER ---
+# Date range / segment / card_brand / gender filters applied where the data is
+# stored instead of on the full transaction frame:
+#   - aggregate cube: a slice of the month x card_brand x gender x segment table
+#     (a searchsorted range on the sorted month key, then the key columns), so a
+#     filtered KPI costs the same whatever the length of the history (date
+#     ranges are whole months there);
+#   - cached frame files: a pyarrow expression, i.e. row-group pruning on the
+#     txn_date statistics and predicate pushdown into the Parquet reader.
+# Filters are frozen and hashable, so results are cached per combination.
+
+from dataclasses import dataclass
+from datetime import date
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+
+from smartlimit.aggregates import month_key
+
+# Filterable key columns (values are matched exactly)
+KEY_FIELDS = {'segments': 'segment_label', 'card_brands': 'card_brand', 'genders': 'gender'}
+
+
+@dataclass(frozen=True)
+class Filters:
+    """``start``/``end`` are inclusive dates; an empty tuple means "every value"."""
+
+    start: date | None = None
+    end: date | None = None
+    segments: tuple = ()
+    card_brands: tuple = ()
+    genders: tuple = ()
+
+    def __post_init__(self):
+        for name in KEY_FIELDS:
+            # Lists from widgets become sorted tuples: hashable, and equal filters share a cache entry
+            object.__setattr__(self, name, tuple(sorted(getattr(self, name) or ())))
+        if self.start is not None and self.end is not None and self.start > self.end:
+            raise ValueError(f"Filter start {self.start} is after end {self.end}")
+
+    @property
+    def active(self):
+        return self != Filters()
+
+    def month_bounds(self):
+        """Inclusive first/last month key of the date range (``None`` = open)."""
+        return tuple(None if value is None else int(month_key([pd.Timestamp(value)])[0])
+                     for value in (self.start, self.end))
+
+    def cube_mask(self, cube):
+        """Boolean mask of the cube rows whose key columns the filters keep."""
+        mask = pd.Series(True, index=cube.index)
+        for name, column in KEY_FIELDS.items():
+            values = getattr(self, name)
+            if values:
+                mask &= cube[column].isin(values)
+        return mask
+
+    def expression(self):
+        """pyarrow filter over transaction rows (``txn_date`` + key columns), or ``None``."""
+        parts = []
+        if self.start is not None:
+            parts.append(ds.field('txn_date') >= pd.Timestamp(self.start))
+        if self.end is not None:
+            # Inclusive end date: everything before the next midnight
+            parts.append(ds.field('txn_date') < pd.Timestamp(self.end) + pd.Timedelta(days=1))
+        for name, column in KEY_FIELDS.items():
+            values = getattr(self, name)
+            if values:
+                parts.append(pc.is_in(ds.field(column), value_set=pa.array(values, type=pa.string())))
+        if not parts:
+            return None
+        expression = parts[0]
+        for part in parts[1:]:
+            expression = expression & part
+        return expression
+
+    def describe(self):
+        parts = []
+        if self.start is not None or self.end is not None:
+            parts.append(f"{self.start or '…'} – {self.end or '…'}")
+        for name in KEY_FIELDS:
+            if getattr(self, name):
+                parts.append(", ".join(getattr(self, name)))
+        return " | ".join(parts) or "Tüm veri"
+
@@ -0,0 +1,151 @@
+# --- ARTIMLI VERİ ALIMI ---
+# Every shard's contribution to the aggregate cube is stored on its own, keyed
+# by the shard's content hash. A refresh only cleans, segments (with the stored
+# model, never a refit) and aggregates shards that are new or whose content
+# changed, then adds up the per-shard tables. A manifest remembers which
+# content each shard name had, so unchanged shards are not even re-read.
+
+import hashlib
+import json
+import logging
+import os
+import time
+from dataclasses import dataclass, field
+
+from smartlimit.aggregates import TransactionAggregates
+from smartlimit.cache import CACHE_DIR_ENV_VAR, DEFAULT_CACHE_DIR, atomic_write, fingerprint_location
+from smartlimit.pipeline import DEFAULT_CHUNKSIZE, PIPELINE_PARAMS, ensure_model, stream_aggregates
+from smartlimit.segmentation import SegmentationConfig
+from smartlimit.sources import ShardSource
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = "manifest.json"
+
+
+def content_hash(shard, marker=None):
+    """sha256 of a local shard's bytes; for remote shards the HTTP validator
+    (GitHub raw serves the content hash as ETag) is used instead of downloading."""
+    if shard.is_remote:
+        return marker
+    digest = hashlib.sha256()
+    with open(shard.location, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def pipeline_key(params, config, model, prediction_marker):
+    # Per-shard aggregates are only valid for the same cleaning, model and predictions
+    payload = {
+        "params": params,
+        "segmentation": config.cache_params(),
+        "model": model.model_id if model is not None else None,
+        "prediction": prediction_marker,
+    }
+    blob = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()[:16]
+
+
+@dataclass
+class IngestReport:
+    processed: list = field(default_factory=list)
+    reused: list = field(default_factory=list)
+    failed: list = field(default_factory=list) # ShardReports
+    seconds: float = 0.0
+
+    def summary(self):
+        return (f"{len(self.processed)} shard işlendi, {len(self.reused)} shard önbellekten, "
+                f"{len(self.failed)} hatalı ({self.seconds:.2f}s)")
+
+
+class IncrementalStore:
+    """Per-shard aggregates under ``<cache dir>/shards/<shard name>/`` plus a manifest."""
+
+    def __init__(self, directory=None):
+        self.directory = directory or os.path.join(os.environ.get(CACHE_DIR_ENV_VAR, DEFAULT_CACHE_DIR), "shards")
+        self.manifest_path = os.path.join(self.directory, MANIFEST_NAME)
+
+    def shard_directory(self, shard):
+        return os.path.join(self.directory, shard.name)
+
+    def load_manifest(self):
+        try:
+            with open(self.manifest_path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {"pipeline": None, "shards": {}}
+
+    def save_manifest(self, manifest):
+        os.makedirs(self.directory, exist_ok=True)
+        with atomic_write(self.manifest_path) as tmp_path, open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+    def ingest(self, source, predictions=None, prediction_marker=None, params=PIPELINE_PARAMS,
+               chunksize=DEFAULT_CHUNKSIZE, config=SegmentationConfig()):
+        """Aggregates of every shard of ``source``, recomputing only new or changed ones.
+
+        Returns ``(aggregates, IngestReport)``. Failed shards are left out of the
+        total and retried on the next call.
+        """
+        start = time.perf_counter()
+        report = IngestReport()
+        if config.level == "customer":
+            # A new shard can move a customer's averaged features and so relabel
+            # transactions of older shards; per-shard contributions do not hold.
+            logger.warning("Customer-level segmentation cannot be ingested incrementally; rebuilding all shards")
+            aggregates, reports = stream_aggregates(source, predictions, params, chunksize, config)
+            report.processed = [r.name for r in reports if r.ok]
+            report.failed = [r for r in reports if not r.ok]
+            report.seconds = time.perf_counter() - start
+            return aggregates, report
+
+        # New shards are labelled with the existing model; it is only fitted when none is stored yet
+        model = ensure_model(source, params, chunksize, config)
+        key = pipeline_key(params, config, model, prediction_marker)
+        manifest = self.load_manifest()
+        known = manifest["shards"] if manifest.get("pipeline") == key else {}
+        if manifest.get("pipeline") not in (None, key):
+            logger.info("Pipeline, model or predictions changed; every shard is reprocessed")
+
+        entries = {}
+        aggregates = TransactionAggregates()
+        for shard in source.shards:
+            marker = fingerprint_location(shard.location)
+            entry = known.get(shard.name)
+            shard_aggregates = None
+            if entry is not None:
+                if marker is None or entry["marker"] != marker:
+                    # Touched or re-uploaded: only the content decides
+                    digest = content_hash(shard, marker)
+                    if digest is not None and digest == entry["hash"]:
+                        entry = {**entry, "marker": marker}
+                    else:
+                        entry = None
+                if entry is not None:
+                    shard_aggregates = TransactionAggregates.load(entry["entry"], self.shard_directory(shard))
+
+            if shard_aggregates is not None:
+                report.reused.append(shard.name)
+            else:
+                shard_aggregates, reports = stream_aggregates(ShardSource([shard]), predictions, params,
+                                                              chunksize, config)
+                failed = [r for r in reports if not r.ok]
+                if failed:
+                    report.failed.extend(failed)
+                    continue
+                digest = content_hash(shard, marker)
+                entry = None
+                if digest is not None:
+                    entry = {"marker": marker, "hash": digest, "entry": f"{key}-{digest[:16]}"}
+                    shard_aggregates.store(entry["entry"], self.shard_directory(shard))
+                report.processed.append(shard.name)
+            if entry is not None:
+                entries[shard.name] = entry
+            aggregates = aggregates.merge(shard_aggregates)
+
+        # Shards that disappeared from the source drop out of the manifest (and the total)
+        self.save_manifest({"pipeline": key, "shards": entries})
+        report.seconds = time.perf_counter() - start
+        logger.info("Incremental ingest: %s", report.summary())
+        return aggregates, report
@@ -0,0 +1,226 @@
+# --- PIPELINE ÖLÇÜMLERİ ---
+# Lightweight per-stage instrumentation: wall time, rows in/out and memory for
+# every stage of a run (e.g. load_and_clean_merged_csv). Library code wraps its
+# steps in ``stage(...)``; outside of a ``run(...)`` that is a no-op, so the
+# modules cost nothing when nobody is measuring. Finished runs are kept per
+# process and can be exported as JSON or Prometheus text. A stage that runs
+# several times in one run (once per chunk or shard) is recorded once, with its
+# time and rows summed and ``calls`` counting the repetitions.
+#
+# Memory is the resident set size after each stage and its change. With
+# SMARTLIMIT_PROFILE_MEMORY=1 tracemalloc also gives each stage's peak of
+# Python/NumPy allocations above what was already allocated when it started,
+# i.e. what the stage itself needed (slower, so off by default).
+
+import contextlib
+import contextvars
+import json
+import logging
+import os
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+
+logger = logging.getLogger(__name__)
+
+PROFILE_MEMORY_ENV_VAR = "SMARTLIMIT_PROFILE_MEMORY"
+METRICS_FILE_ENV_VAR = "SMARTLIMIT_METRICS_FILE"
+
+_current_run = contextvars.ContextVar("smartlimit_run", default=None)
+_stage_path = contextvars.ContextVar("smartlimit_stage_path", default=())
+# Absolute tracemalloc peaks reported to the enclosing stage (its children reset the peak)
+_peaks = contextvars.ContextVar("smartlimit_peaks", default=None)
+# Last finished run per name, for the debug panel and exports
+LAST_RUNS = {}
+
+
+def rss_bytes():
+    """Resident set size of this process, or ``None`` where /proc is not available."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+@dataclass
+class StageRecord:
+    stage: str
+    seconds: float = 0.0
+    calls: int = 1
+    rows_in: int | None = None
+    rows_out: int | None = None
+    rss_mb: float | None = None
+    rss_delta_mb: float | None = None
+    peak_mb: float | None = None
+
+
+@dataclass
+class PipelineRun:
+    name: str
+    started_at: str = field(default_factory=lambda: datetime.now(timezone.utc).isoformat(timespec="seconds"))
+    seconds: float = 0.0
+    stages: list = field(default_factory=list)
+
+    def add(self, record):
+        for existing in self.stages:
+            if existing.stage == record.stage:
+                existing.seconds += record.seconds
+                existing.calls += 1
+                for attribute in ("rows_in", "rows_out"):
+                    value = getattr(record, attribute)
+                    if value is not None:
+                        setattr(existing, attribute, (getattr(existing, attribute) or 0) + value)
+                for attribute in ("rss_mb", "rss_delta_mb", "peak_mb"):
+                    value = getattr(record, attribute)
+                    if value is not None:
+                        setattr(existing, attribute, max(value, getattr(existing, attribute) or value))
+                return
+        self.stages.append(record)
+
+    def to_dict(self):
+        return asdict(self)
+
+
+class _StageHandle:
+    """Yielded by :func:`stage`; set ``rows_out`` before the block ends."""
+
+    def __init__(self, rows_in=None):
+        self.rows_in = rows_in
+        self.rows_out = None
+
+
+@contextlib.contextmanager
+def run(name):
+    """Collect every ``stage`` executed inside the block into a :class:`PipelineRun`."""
+    pipeline_run = PipelineRun(name)
+    run_token = _current_run.set(pipeline_run)
+    path_token = _stage_path.set(())
+    profile = os.environ.get(PROFILE_MEMORY_ENV_VAR, "") not in ("", "0")
+    started_tracing = profile and not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        yield pipeline_run
+    finally:
+        pipeline_run.seconds = time.perf_counter() - start
+        if started_tracing:
+            tracemalloc.stop()
+        _stage_path.reset(path_token)
+        _current_run.reset(run_token)
+        LAST_RUNS[name] = pipeline_run
+        logger.info("%s finished in %.2fs (%d stages)", name, pipeline_run.seconds, len(pipeline_run.stages))
+        export_to_file()
+
+
+@contextlib.contextmanager
+def stage(name, rows_in=None):
+    """Time one step of the current run; nested stages are recorded as ``outer/inner``."""
+    pipeline_run = _current_run.get()
+    handle = _StageHandle(rows_in)
+    if pipeline_run is None:
+        yield handle
+        return
+    path = _stage_path.get() + (name,)
+    path_token = _stage_path.set(path)
+    rss_before = rss_bytes()
+    tracing = tracemalloc.is_tracing()
+    peaks = []
+    if tracing:
+        traced_before, peak_before = tracemalloc.get_traced_memory()
+        if _peaks.get() is not None:
+            _peaks.get().append(peak_before) # The parent's peak so far, lost by the reset
+        tracemalloc.reset_peak()
+    peaks_token = _peaks.set(peaks)
+    start = time.perf_counter()
+    try:
+        yield handle
+    finally:
+        seconds = time.perf_counter() - start
+        _peaks.reset(peaks_token)
+        _stage_path.reset(path_token)
+        rss_after = rss_bytes()
+        peak_mb = None
+        if tracing:
+            peak = max([tracemalloc.get_traced_memory()[1]] + peaks)
+            peak_mb = (peak - traced_before) / 2**20
+            if _peaks.get() is not None:
+                _peaks.get().append(peak)
+        record = StageRecord(
+            stage="/".join(path),
+            seconds=seconds,
+            rows_in=None if handle.rows_in is None else int(handle.rows_in),
+            rows_out=None if handle.rows_out is None else int(handle.rows_out),
+            rss_mb=None if rss_after is None else rss_after / 2**20,
+            rss_delta_mb=None if rss_after is None or rss_before is None else (rss_after - rss_before) / 2**20,
+            peak_mb=peak_mb,
+        )
+        pipeline_run.add(record)
+
+
+def record(name, seconds, rows_in=None, rows_out=None):
+    """Add a stage measured elsewhere (e.g. a shard report) to the current run."""
+    pipeline_run = _current_run.get()
+    if pipeline_run is not None:
+        path = "/".join(_stage_path.get() + (name,))
+        pipeline_run.add(StageRecord(path, seconds, rows_in=rows_in, rows_out=rows_out))
+
+
+# --- Dışa aktarma ---
+
+def to_json(runs=None):
+    runs = LAST_RUNS.values() if runs is None else runs
+    return json.dumps([r.to_dict() for r in runs], ensure_ascii=False, indent=2)
+
+
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"')
+
+
+def to_prometheus(runs=None):
+    """Prometheus text exposition format (one gauge family per measure)."""
+    runs = list(LAST_RUNS.values() if runs is None else runs)
+    families = [
+        ("smartlimit_run_seconds", "Wall time of a pipeline run", None),
+        ("smartlimit_stage_seconds", "Wall time of a pipeline stage", "seconds"),
+        ("smartlimit_stage_calls", "Times a pipeline stage ran", "calls"),
+        ("smartlimit_stage_rows_in", "Rows entering a pipeline stage", "rows_in"),
+        ("smartlimit_stage_rows_out", "Rows leaving a pipeline stage", "rows_out"),
+        ("smartlimit_stage_rss_bytes", "Resident set size after a pipeline stage", "rss_mb"),
+        ("smartlimit_stage_peak_bytes", "Peak traced allocations during a pipeline stage", "peak_mb"),
+    ]
+    lines = []
+    for metric, help_text, attribute in families:
+        lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} gauge"]
+        for pipeline_run in runs:
+            if attribute is None:
+                lines.append(f'{metric}{{run="{_label(pipeline_run.name)}"}} {pipeline_run.seconds:.6f}')
+                continue
+            for record in pipeline_run.stages:
+                value = getattr(record, attribute)
+                if value is None:
+                    continue
+                if attribute.endswith("_mb"):
+                    value = value * 2**20
+                lines.append(f'{metric}{{run="{_label(pipeline_run.name)}",stage="{_label(record.stage)}"}} {value:g}')
+    return "\n".join(lines) + "\n"
+
+
+def export_to_file(path=None):
+    """Write all runs to ``$SMARTLIMIT_METRICS_FILE`` (``.prom`` = Prometheus text, else JSON)."""
+    path = path or os.environ.get(METRICS_FILE_ENV_VAR)
+    if not path:
+        return None
+    # Imported here: smartlimit.cache itself records its reads through this module
+    from smartlimit.cache import atomic_write
+
+    text = to_prometheus() if path.endswith(".prom") else to_json()
+    try:
+        with atomic_write(path) as tmp_path, open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(text)
+    except OSError as e:
+        logger.warning("Could not write metrics to %s: %s", path, e)
+        return None
+    return path
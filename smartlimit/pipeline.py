@@ -0,0 +1,248 @@
+# --- TEMİZLEME + SEGMENTASYON ADIMLARI ---
+# The cleaning and K-Means steps of load_and_clean_merged_csv as plain functions,
+# shared by the in-memory loader and the streaming (chunked) aggregate builder.
+
+import logging
+from dataclasses import dataclass, field, replace
+
+import numpy as np
+import pandas as pd
+
+from smartlimit.aggregates import TransactionAggregates, month_key
+from smartlimit.cleaning import clean_currency_columns
+from smartlimit.instrumentation import stage
+from smartlimit.schema import READ_DTYPES, apply_schema
+from smartlimit.segment_model import fit_model, load_model, segment_labels
+from smartlimit.segmentation import SegmentationConfig, broadcast_labels, clustering_features, segment_features
+
+logger = logging.getLogger(__name__)
+
+# Every parameter that changes the cleaned/segmented output belongs here: it is part
+# of the on-disk cache key, so editing it invalidates the Parquet cache.
+PIPELINE_PARAMS = {
+    "version": 6,
+    "currency_columns": ['total_debt', 'yearly_income', 'credit_limit', 'amount'],
+    "drop_columns": ['errors', 'merchant_id'],
+    "features_cols": ['credit_score', 'yearly_income', 'total_debt', 'amount'],
+    "n_clusters": 4,
+    "random_state": 42,
+    "n_init": 10,
+    # Label per cluster, chosen by centroid: weights on the standardized features,
+    # matched one-to-one with the clusters (see smartlimit.segment_model.label_clusters)
+    "segment_profiles": {
+        "Riskli & Düşük Gelirli": {"credit_score": -1.0, "yearly_income": -1.0},
+        "Premium Müşteri": {"credit_score": 1.0, "yearly_income": 1.0},
+        "Gelişmekte Olan Müşteri": {},
+        "Borç Yükü Altında": {"total_debt": 1.0, "amount": 1.0},
+    },
+}
+UNSEGMENTED_LABEL = 'Segmentasyon Yapılamadı (Eksik Veri)'
+
+DEFAULT_CHUNKSIZE = 250_000
+
+
+def clean_transactions(df, params=PIPELINE_PARAMS):
+    # Vectorized "$"/"," stripping; unparseable or blank values become NaN
+    with stage("clean_currency", rows_in=len(df)) as s:
+        clean_currency_columns(df, params['currency_columns'])
+        s.rows_out = len(df)
+
+    # Convert 'txn_date' to datetime, coercing errors to NaT
+    with stage("parse_dates", rows_in=len(df)) as s:
+        df['txn_date'] = pd.to_datetime(df['txn_date'], errors='coerce')
+        s.rows_out = len(df)
+    # Drop rows where 'txn_date' is NaT if it's critical for analysis
+    with stage("dropna_dates", rows_in=len(df)) as s:
+        df = df.dropna(subset=['txn_date'])
+        s.rows_out = len(df)
+    # Compact month key, derived once here and reused by every monthly aggregate
+    df['txn_month'] = month_key(df['txn_date'])
+
+    # IMPORTANT: Do not drop 'user_id' if it's needed for merging with prediction data
+    return df.drop(columns=params['drop_columns'], errors='ignore')
+
+
+def customer_feature_totals(df, params):
+    """Per ``user_id`` sums and counts of the clustering features; totals from
+    different chunks add up, and ``sum / count`` gives :func:`customer_features`."""
+    features = df[params['features_cols']].astype('float64')
+    grouped = features.groupby(df['user_id'].rename('user_id'), sort=False)
+    return pd.concat({'sum': grouped.sum(), 'count': grouped.count()}, axis=1)
+
+
+def _merge_totals(left, right):
+    return right if left is None else pd.concat([left, right]).groupby(level=0, sort=False).sum()
+
+
+def _sample_features(source, params, chunksize, read_csv_kwargs, config):
+    # Uniform random sample of transaction rows, at most config.sample_size of them
+    rng = np.random.default_rng(params['random_state'])
+    sample = None
+    for _, chunk in source.iter_chunks(chunksize, read_csv_kwargs):
+        features = segment_features(clean_transactions(chunk, params), params)
+        features = features.assign(_key=rng.random(len(features)))
+        sample = pd.concat([sample, features]) if sample is not None else features
+        if len(sample) > config.sample_size:
+            sample = sample.nsmallest(config.sample_size, '_key')
+    return None if sample is None else sample.drop(columns='_key')
+
+
+def _customer_features(source, params, chunksize, read_csv_kwargs):
+    # Every customer, averaged over all of its transactions across chunks
+    totals = None
+    for _, chunk in source.iter_chunks(chunksize, read_csv_kwargs):
+        chunk = clean_transactions(chunk, params)
+        if 'user_id' in chunk.columns:
+            totals = _merge_totals(totals, customer_feature_totals(chunk, params))
+    if totals is None:
+        return None
+    return (totals['sum'] / totals['count'].replace(0, np.nan)).dropna()
+
+
+def ensure_model(source, params=PIPELINE_PARAMS, chunksize=DEFAULT_CHUNKSIZE, config=SegmentationConfig()):
+    """The stored transaction-level segmentation model, or one fitted (and stored)
+    on a uniform sample of ``source`` when there is none yet."""
+    model = load_model(params, config)
+    if model is None:
+        sample = _sample_features(source, params, chunksize, {'dtype': READ_DTYPES}, config)
+        if sample is not None and not sample.empty:
+            model, _ = fit_model(sample, params, config)
+    return model
+
+
+@dataclass
+class FrameBuild:
+    """Result of :func:`build_frame`; ``messages`` are ``(level, text)`` pairs
+    (``"error"``/``"warning"``) for the caller to show."""
+    df: pd.DataFrame
+    complete: bool = True
+    messages: list = field(default_factory=list)
+
+
+def build_frame(source, predictions=None, params=PIPELINE_PARAMS, config=SegmentationConfig(),
+                model_directory=None, max_workers=None, executor=None):
+    """The cleaned, segmented transaction frame of ``source`` with ``prediction_rf``
+    attached from ``predictions`` (a :class:`~smartlimit.predictions.PredictionStore`).
+
+    ``complete`` is False when a shard or the predictions were missing, i.e. the
+    result must not be persisted as this data version. ``max_workers``/``executor``
+    are passed to :meth:`~smartlimit.sources.ShardSource.load`.
+    """
+    with stage("download_parse") as s:
+        loaded = source.load(max_workers, executor, read_csv_kwargs={'dtype': READ_DTYPES})
+        s.rows_out = sum(report.rows for report in loaded.reports)
+    logger.info("Shard load:\n%s", loaded.summary())
+    # Failed shards are skipped
+    build = FrameBuild(pd.DataFrame(), not loaded.failed,
+                       [("error", f"Error loading {report.name}: {report.error}") for report in loaded.failed])
+    if not loaded.frames:
+        build.messages.append(("error", "No data files could be loaded. Please check the URLs and file paths."))
+        build.complete = False
+        return build
+
+    with stage("concat", rows_in=sum(len(frame) for frame in loaded.frames)) as s:
+        df = loaded.concat()
+        s.rows_out = len(df)
+    with stage("clean", rows_in=len(df)) as s:
+        df = clean_transactions(df, params)
+        s.rows_out = len(df)
+    build.df = df
+
+    # --- 3. SEGMENTASYON (K-MEANS) ---
+    features_cols = params['features_cols']
+    if not all(col in df.columns for col in features_cols):
+        build.messages.append(("warning", f"Missing one or more required columns for segmentation: "
+                                          f"{features_cols}. Skipping segmentation."))
+        df['segment_label'] = 'Segmentasyon Yapılamadı'
+        return build
+
+    # Rows (or, at the customer level, users) with a NaN feature are left out of clustering
+    if config.level == "customer" and 'user_id' not in df.columns:
+        build.messages.append(("warning", "user_id column missing; segmenting transactions instead of customers."))
+        config = replace(config, level="transaction")
+    with stage("clustering_features", rows_in=len(df)) as s:
+        features = clustering_features(df, params, config)
+        s.rows_out = len(features)
+
+    if features.empty:
+        build.messages.append(("warning", "No valid data for segmentation after dropping NaNs. Skipping segmentation."))
+        df['segment_label'] = 'Segmentasyon Yapılamadı (Veri Eksik)'
+        return build
+
+    # The stored model only predicts; it is fitted (and saved) on the first build
+    with stage("segmentation", rows_in=len(features)) as s:
+        _, labels = segment_labels(features, params, config, model_directory)
+        s.rows_out = len(labels)
+
+    # Index join: features are indexed by row (transaction level) or user_id (customer level);
+    # rows left out of clustering get UNSEGMENTED_LABEL
+    with stage("broadcast_labels", rows_in=len(labels)) as s:
+        df['segment_label'] = broadcast_labels(labels, df, config).fillna(UNSEGMENTED_LABEL)
+        s.rows_out = len(df)
+
+    if predictions is not None and not predictions.empty and 'user_id' in df.columns:
+        # Keyed lookup on user_id (no merge copy); users without predictions get the mean
+        predictions.attach(df, fill='mean')
+    else:
+        build.messages.append(("warning", "Prediction data could not be loaded or merged. "
+                                          "Prediction graphs may be empty."))
+        df['prediction_rf'] = pd.NA # Ensure column exists even if empty
+        build.complete = False
+
+    # Categoricals, downcast ids, float32 balances, real bool; logs memory before/after
+    with stage("apply_schema", rows_in=len(df)) as s:
+        apply_schema(df)
+        s.rows_out = len(df)
+    return build
+
+
+def stream_aggregates(source, predictions=None, params=PIPELINE_PARAMS,
+                      chunksize=DEFAULT_CHUNKSIZE, config=SegmentationConfig()):
+    """Build :class:`TransactionAggregates` from ``source`` without concatenating it.
+
+    ``predictions`` is an optional :class:`~smartlimit.predictions.PredictionStore`.
+
+    Two passes over the shards, ``chunksize`` rows at a time:
+
+    1. clean each chunk and keep a uniform random sample (at most
+       ``config.sample_size`` rows) of the clustering features, or, at the
+       customer level, per-customer feature totals; fit the scaler and
+       clustering model on that unless a stored model exists (then, at the
+       transaction level, this pass is skipped);
+    2. clean each chunk again, assign segments with the fitted model (or the
+       per-customer labels), attach predictions and fold the chunk into the
+       running aggregates.
+
+    Peak memory is one chunk plus the sample (or one row per customer),
+    whatever the dataset size.
+    Returns ``(aggregates, shard reports of the second pass)``.
+    """
+    read_csv_kwargs = {'dtype': READ_DTYPES}
+    customer_labels = None
+    if config.level == "customer":
+        model = load_model(params, config)
+        customers = _customer_features(source, params, chunksize, read_csv_kwargs)
+        if customers is not None and not customers.empty:
+            if model is None:
+                model, _ = fit_model(customers, params, config)
+            customer_labels = model.predict_labels(customers, config)
+    else:
+        # A stored model makes the sampling pass unnecessary
+        model = ensure_model(source, params, chunksize, config)
+
+    aggregates = TransactionAggregates()
+    reports = []
+    for _, chunk in source.iter_chunks(chunksize, read_csv_kwargs, reports):
+        chunk = clean_transactions(chunk, params)
+        chunk['segment_label'] = UNSEGMENTED_LABEL
+        if customer_labels is not None and 'user_id' in chunk.columns:
+            chunk['segment_label'] = broadcast_labels(customer_labels, chunk, config).fillna(UNSEGMENTED_LABEL)
+        elif model is not None and config.level == "transaction":
+            features = segment_features(chunk, params)
+            if not features.empty:
+                chunk.loc[features.index, 'segment_label'] = model.predict_labels(features, config)
+        if predictions is not None and not predictions.empty and 'user_id' in chunk.columns:
+            # Users without a prediction stay NaN; segment_prediction() fills them with the mean
+            predictions.attach(chunk, fill=None)
+        aggregates = aggregates.merge(TransactionAggregates.from_frame(chunk))
+    return aggregates, reports
@@ -0,0 +1,96 @@
+# --- TAHMİN DEPOSU ---
+# prediction_rf holds one value per customer, so it is kept as a Series indexed
+# by user_id and attached to transactions with an index lookup (get_indexer +
+# take) instead of a DataFrame merge that copies the whole transaction frame.
+# Keys are normalized to int64 on both sides, so int64 / nullable Int64 / float
+# or string user_id columns all match.
+
+import logging
+
+import numpy as np
+import pandas as pd
+
+from smartlimit.instrumentation import stage
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_user_ids(values):
+    """``values`` as float64 user ids; unparseable or non-integral ids become NaN."""
+    ids = pd.to_numeric(pd.Series(values), errors='coerce').to_numpy(dtype='float64', na_value=np.nan, copy=True)
+    ids[ids != np.floor(ids)] = np.nan
+    return ids
+
+
+class PredictionStore:
+    """``prediction_rf`` per ``user_id`` (unique, sorted int64 index)."""
+
+    def __init__(self, predictions=None):
+        self.predictions = (pd.Series(dtype='float64', index=pd.Index([], dtype='int64'), name='prediction_rf')
+                            if predictions is None else predictions)
+
+    @classmethod
+    def from_frame(cls, df, user_col='user_id', value_col='prediction_rf'):
+        """Build from a frame with one prediction per user; invalid rows are dropped,
+        duplicated users keep their first prediction (and are logged)."""
+        if df is None or df.empty or user_col not in df.columns or value_col not in df.columns:
+            return cls()
+        ids = normalize_user_ids(df[user_col])
+        values = pd.to_numeric(df[value_col], errors='coerce').to_numpy(dtype='float64')
+        valid = ~np.isnan(ids) & ~np.isnan(values)
+        if not valid.all():
+            logger.warning("Dropped %d prediction rows with a missing or invalid user_id/prediction", (~valid).sum())
+        predictions = pd.Series(values[valid], index=pd.Index(ids[valid].astype('int64'), name='user_id'),
+                                name='prediction_rf')
+
+        duplicated = predictions.index.duplicated()
+        if duplicated.any():
+            conflicting = predictions.groupby(level=0).nunique().gt(1).sum()
+            logger.warning("%d duplicated user_id rows in predictions (%d users with conflicting values); "
+                           "keeping the first prediction per user", duplicated.sum(), conflicting)
+            predictions = predictions[~duplicated]
+        return cls(predictions.sort_index())
+
+    @classmethod
+    def read_csv(cls, location, **read_csv_kwargs):
+        return cls.from_frame(pd.read_csv(location, usecols=['user_id', 'prediction_rf'], **read_csv_kwargs))
+
+    @property
+    def empty(self):
+        return self.predictions.empty
+
+    def __len__(self):
+        return len(self.predictions)
+
+    def lookup(self, user_ids):
+        """float64 array of predictions aligned with ``user_ids`` (NaN where unknown)."""
+        ids = normalize_user_ids(user_ids)
+        positions = np.full(len(ids), -1, dtype=np.intp)
+        known = ~np.isnan(ids)
+        positions[known] = self.predictions.index.get_indexer(ids[known].astype('int64'))
+        values = np.append(self.predictions.to_numpy(dtype='float64'), np.nan) # -1 takes the NaN
+        return values.take(positions)
+
+    def attach(self, df, column='prediction_rf', fill='mean'):
+        """Set ``df[column]`` from ``df['user_id']`` in place.
+
+        ``fill='mean'`` fills transactions of users without a prediction with the
+        mean over the matched transactions; ``fill=None`` leaves them NaN.
+        """
+        with stage("attach_predictions", rows_in=len(df)) as s:
+            values = self.lookup(df['user_id'])
+            missing = np.isnan(values)
+            if missing.any():
+                logger.info("%d of %d transactions have no prediction", missing.sum(), len(values))
+                if fill == 'mean' and not missing.all():
+                    values[missing] = values[~missing].mean()
+            df[column] = values
+            s.rows_out = int((~missing).sum()) # Transactions that matched a prediction
+        return df
+
+    def table(self):
+        """One row per user: ``user_id``, ``prediction_rf``, sorted by user_id."""
+        predictions = self.predictions
+        if not predictions.index.is_monotonic_increasing:
+            predictions = predictions.sort_index()
+        return pd.DataFrame({'user_id': predictions.index.to_numpy(), 'prediction_rf': predictions.to_numpy()})
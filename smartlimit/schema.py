@@ -0,0 +1,92 @@
+# --- TİPLİ ŞEMA ---
+# Explicit dtypes for the merged transaction frame. The frame is pinned in the
+# Streamlit cache of every server, so categoricals, downcast integer ids,
+# float32 balances and a real bool column translate directly into more
+# concurrent sessions per box.
+
+import logging
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Low-cardinality strings, parsed straight into categoricals by read_csv
+CATEGORY_COLUMNS = ['gender', 'card_brand', 'card_type']
+READ_DTYPES = {col: 'category' for col in CATEGORY_COLUMNS}
+
+INTEGER_COLUMNS = ['user_id', 'card_id', 'merchant_id', 'credit_score']
+BOOL_COLUMNS = ['card_on_dark_web']
+# Balances are whole dollars well below 2**24, so float32 is usually exact.
+# ``amount`` stays float64: it is summed over millions of rows.
+FLOAT32_CANDIDATES = ['total_debt', 'yearly_income', 'credit_limit', 'prediction_rf']
+FLOAT32_TOLERANCE = 0.005 # Half a cent
+DERIVED_CATEGORY_COLUMNS = ['segment_label']
+
+_TRUE_STRINGS = {'true', 't', 'yes', 'y', '1'}
+
+
+def frame_memory(df):
+    return int(df.memory_usage(deep=True).sum())
+
+
+def _downcast_integer(series):
+    if series.isna().any():
+        return pd.to_numeric(series.astype('Int64'), downcast='integer')
+    return pd.to_numeric(series, downcast='integer')
+
+
+def _fits_float32(series):
+    values = series.to_numpy(dtype='float64', na_value=np.nan)
+    diff = np.abs(values.astype('float32').astype('float64') - values)
+    return not np.nanmax(diff, initial=0.0) > FLOAT32_TOLERANCE
+
+
+def _as_bool(series):
+    if pd.api.types.is_bool_dtype(series):
+        result = series.astype('boolean')
+    else:
+        text = series.astype('string').str.strip().str.lower()
+        result = text.isin(_TRUE_STRINGS).astype('boolean')
+        result[text.isna()] = pd.NA
+    # Plain bool when complete, nullable boolean when values are missing
+    return result if result.isna().any() else result.astype(bool)
+
+
+def apply_schema(df):
+    """Cast ``df`` to the compact schema in place; returns ``(before, after)`` bytes."""
+    before = frame_memory(df)
+    for col in INTEGER_COLUMNS:
+        if col in df.columns and pd.api.types.is_numeric_dtype(df[col]):
+            df[col] = _downcast_integer(df[col])
+    for col in BOOL_COLUMNS:
+        if col in df.columns:
+            df[col] = _as_bool(df[col])
+    for col in FLOAT32_CANDIDATES:
+        if col in df.columns and pd.api.types.is_float_dtype(df[col]) and _fits_float32(df[col]):
+            df[col] = df[col].astype('float32')
+    for col in CATEGORY_COLUMNS + DERIVED_CATEGORY_COLUMNS:
+        if col in df.columns and not isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype('category')
+    after = frame_memory(df)
+    logger.info("Typed schema: %.1f MB -> %.1f MB", before / 2**20, after / 2**20)
+    return before, after
+
+
+def concat_frames(frames):
+    """``pd.concat`` that keeps categoricals categorical when shards disagree on categories."""
+    if not frames:
+        return pd.DataFrame()
+    category_columns = {
+        col for frame in frames for col in frame.columns
+        if isinstance(frame[col].dtype, pd.CategoricalDtype)
+    }
+    for col in category_columns:
+        present = [frame for frame in frames if col in frame.columns]
+        for frame in present:
+            if not isinstance(frame[col].dtype, pd.CategoricalDtype):
+                frame[col] = frame[col].astype('category')
+        categories = pd.api.types.union_categoricals([frame[col] for frame in present]).categories
+        for frame in present:
+            frame[col] = frame[col].cat.set_categories(categories)
+    return pd.concat(frames, ignore_index=True)
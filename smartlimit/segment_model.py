@@ -0,0 +1,198 @@
+# --- KALICI SEGMENTASYON MODELİ ---
+# The fitted scaler and K-Means centroids are saved as a small versioned JSON
+# artifact next to the data cache. Later builds only scale and assign rows to
+# the nearest centroid instead of refitting. Business labels are chosen from
+# centroid characteristics (see ``segment_profiles``), never from raw cluster
+# ids, so a refit cannot silently swap what a dashboard card means.
+
+import hashlib
+import json
+import logging
+import os
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+import sklearn
+from scipy.optimize import linear_sum_assignment
+
+from smartlimit.cache import CACHE_DIR_ENV_VAR, DEFAULT_CACHE_DIR, atomic_write
+from smartlimit.instrumentation import stage
+from smartlimit.segmentation import SegmentationConfig, segment
+
+logger = logging.getLogger(__name__)
+
+# Bump when the artifact layout changes; older files are then ignored
+MODEL_FORMAT_VERSION = 1
+
+
+def label_clusters(centers, features_cols, profiles):
+    """Business label for every cluster from its standardized centroid.
+
+    Each profile weights the centroid coordinates (e.g. high income and credit
+    score for "Premium Müşteri"); clusters and labels are matched one-to-one so
+    that the summed profile score is maximal. Extra clusters get "Segment <i>".
+    """
+    names = list(profiles)
+    weights = np.array([[profiles[name].get(col, 0.0) for col in features_cols] for name in names])
+    scores = centers @ weights.T # (clusters, labels)
+    rows, cols = linear_sum_assignment(scores, maximize=True)
+    labels = [f"Segment {i}" for i in range(len(centers))]
+    for cluster, label in zip(rows, cols):
+        labels[cluster] = names[label]
+    return labels
+
+
+def model_key(params, config=SegmentationConfig()):
+    # Everything that changes the fitted centroids or their labels
+    payload = {
+        "format": MODEL_FORMAT_VERSION,
+        "features_cols": params['features_cols'],
+        "n_clusters": params['n_clusters'],
+        "random_state": params['random_state'],
+        "n_init": params['n_init'],
+        "segment_profiles": params['segment_profiles'],
+        "segmentation": config.cache_params(),
+    }
+    blob = json.dumps(payload, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()[:16]
+
+
+def model_path(params, config=SegmentationConfig(), directory=None):
+    directory = directory or os.path.join(os.environ.get(CACHE_DIR_ENV_VAR, DEFAULT_CACHE_DIR), "models")
+    return os.path.join(directory, f"segmentation-v{MODEL_FORMAT_VERSION}-{model_key(params, config)}.json")
+
+
+@dataclass
+class SegmentationModel:
+    """Scaler statistics, centroids (in scaled space) and one label per centroid."""
+
+    features_cols: list
+    mean: np.ndarray
+    scale: np.ndarray
+    centers: np.ndarray
+    labels: list
+    metadata: dict = field(default_factory=dict)
+
+    @classmethod
+    def from_segmenter(cls, segmenter, params, fit_rows, config=SegmentationConfig(), **metadata):
+        scaler, model = segmenter
+        centers = np.asarray(model.cluster_centers_, dtype='float64')
+        return cls(
+            features_cols=list(params['features_cols']),
+            mean=np.asarray(scaler.mean_, dtype='float64'),
+            scale=np.asarray(scaler.scale_, dtype='float64'),
+            centers=centers,
+            labels=label_clusters(centers, params['features_cols'], params['segment_profiles']),
+            metadata={
+                "format": MODEL_FORMAT_VERSION,
+                "key": model_key(params, config),
+                "fitted_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                "fit_rows": int(fit_rows),
+                "segmentation": config.cache_params(),
+                "sklearn": sklearn.__version__,
+                **metadata,
+            },
+        )
+
+    @property
+    def model_id(self):
+        return f"{self.metadata.get('key')}@{self.metadata.get('fitted_at')}"
+
+    def cluster_ids(self, features, config=SegmentationConfig()):
+        """Nearest centroid per row, i.e. ``KMeans.predict`` after ``StandardScaler.transform``."""
+        features = features[self.features_cols]
+        clusters = np.empty(len(features), dtype=np.int32)
+        with stage("predict", rows_in=len(features)) as s:
+            for start in range(0, len(features), config.predict_chunk):
+                chunk = features.iloc[start:start + config.predict_chunk]
+                X = (chunk.to_numpy(dtype='float64') - self.mean) / self.scale
+                distances = np.stack([((X - center) ** 2).sum(axis=1) for center in self.centers], axis=1)
+                clusters[start:start + len(chunk)] = distances.argmin(axis=1)
+            s.rows_out = len(clusters)
+        return clusters
+
+    def labels_for(self, clusters, index):
+        return pd.Series(np.asarray(self.labels, dtype=object)[clusters], index=index)
+
+    def predict_labels(self, features, config=SegmentationConfig()):
+        return self.labels_for(self.cluster_ids(features, config), features.index)
+
+    def to_dict(self):
+        return {
+            "features_cols": self.features_cols,
+            "mean": self.mean.tolist(),
+            "scale": self.scale.tolist(),
+            "centers": self.centers.tolist(),
+            "labels": self.labels,
+            "metadata": self.metadata,
+        }
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        try:
+            with atomic_write(path) as tmp_path, open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+        except OSError as e:
+            logger.warning("Could not write segmentation model %s: %s", path, e)
+            return None
+        logger.info("Saved segmentation model %s", path)
+        return path
+
+    @classmethod
+    def load(cls, path):
+        """Model saved at ``path`` by :meth:`save`, or ``None`` (missing, unreadable or another format)."""
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+            if data["metadata"].get("format") != MODEL_FORMAT_VERSION:
+                return None
+            return cls(
+                features_cols=data["features_cols"],
+                mean=np.asarray(data["mean"], dtype='float64'),
+                scale=np.asarray(data["scale"], dtype='float64'),
+                centers=np.asarray(data["centers"], dtype='float64'),
+                labels=data["labels"],
+                metadata=data["metadata"],
+            )
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning("Ignoring unreadable segmentation model %s: %s", path, e)
+            return None
+
+
+def stored_model(params, config=SegmentationConfig(), directory=None):
+    """The model last saved for ``params``/``config``, even when a refit is requested
+    (after a build, the one it fitted); ``None`` if there is none."""
+    return SegmentationModel.load(model_path(params, config, directory))
+
+
+def load_model(params, config=SegmentationConfig(), directory=None):
+    """The stored model for ``params``/``config``; ``None`` if missing or a refit is requested."""
+    if config.refit:
+        return None
+    model = stored_model(params, config, directory)
+    if model is not None:
+        logger.info("Loaded segmentation model %s (%d fit rows)", model.model_id, model.metadata.get("fit_rows", 0))
+    return model
+
+
+def fit_model(features, params, config=SegmentationConfig(), directory=None, **metadata):
+    """Fit on ``features``, persist the model and return ``(model, clusters of features)``."""
+    result = segment(features, params, config)
+    model = SegmentationModel.from_segmenter(result.segmenter, params, result.fit_rows, config, **metadata)
+    model.save(model_path(params, config, directory))
+    logger.info("Segmentation labels by cluster: %s", dict(enumerate(model.labels)))
+    return model, result.clusters
+
+
+def segment_labels(features, params, config=SegmentationConfig(), directory=None):
+    """Segment label per row of ``features``: predicted with the stored model, or fitted
+    (and stored) when there is none yet. Returns ``(model, labels)``."""
+    model = load_model(params, config, directory)
+    if model is not None:
+        return model, model.predict_labels(features, config)
+    model, clusters = fit_model(features, params, config, directory)
+    return model, model.labels_for(clusters, features.index)
@@ -0,0 +1,205 @@
+# --- SEGMENTASYON MOTORU ---
+# StandardScaler + K-Means with a configurable fit strategy:
+#   full      - KMeans on every row (the original behavior)
+#   sample    - KMeans on a uniform random sample, then predict every row
+#   minibatch - MiniBatchKMeans over all rows
+# and a configurable level: one point per transaction row, or one point per
+# customer (features averaged per user_id, labels broadcast back by user_id).
+# Labels for all rows always come from a chunked ``predict`` so the distance
+# matrix stays bounded. Timings and the quality gap to the full fit are
+# reported so the speed/quality tradeoff can be chosen with real numbers.
+
+import logging
+import os
+import time
+from dataclasses import asdict, dataclass, field
+
+import numpy as np
+from scipy.optimize import linear_sum_assignment
+from sklearn.cluster import KMeans, MiniBatchKMeans
+from sklearn.metrics import adjusted_rand_score
+from sklearn.preprocessing import StandardScaler
+from threadpoolctl import threadpool_limits
+
+from smartlimit.instrumentation import stage
+
+logger = logging.getLogger(__name__)
+
+METHOD_ENV_VAR = "SMARTLIMIT_SEGMENTATION"
+SAMPLE_SIZE_ENV_VAR = "SMARTLIMIT_SEGMENTATION_SAMPLE"
+THREADS_ENV_VAR = "SMARTLIMIT_SEGMENTATION_THREADS"
+LEVEL_ENV_VAR = "SMARTLIMIT_SEGMENTATION_LEVEL"
+REFIT_ENV_VAR = "SMARTLIMIT_SEGMENTATION_REFIT"
+METHODS = ("full", "sample", "minibatch")
+LEVELS = ("transaction", "customer")
+
+
+@dataclass(frozen=True)
+class SegmentationConfig:
+    method: str = "full"
+    sample_size: int = 200_000
+    batch_size: int = 8_192
+    predict_chunk: int = 1_000_000
+    # OpenMP/BLAS threads for fit and predict; None uses every core. Chunks are
+    # predicted one after another, each using all threads, so pools never nest.
+    n_threads: int | None = None
+    # "customer" clusters one row per user_id, so each customer gets exactly one segment
+    level: str = "transaction"
+    # Ignore the persisted model (smartlimit.segment_model) and fit a new one
+    refit: bool = False
+
+    def __post_init__(self):
+        if self.method not in METHODS:
+            raise ValueError(f"Unknown segmentation method {self.method!r}, expected one of {METHODS}")
+        if self.level not in LEVELS:
+            raise ValueError(f"Unknown segmentation level {self.level!r}, expected one of {LEVELS}")
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            method=os.environ.get(METHOD_ENV_VAR, cls.method),
+            sample_size=int(os.environ.get(SAMPLE_SIZE_ENV_VAR, cls.sample_size)),
+            n_threads=int(os.environ.get(THREADS_ENV_VAR, 0)) or None,
+            level=os.environ.get(LEVEL_ENV_VAR, cls.level),
+            refit=os.environ.get(REFIT_ENV_VAR, "") not in ("", "0"),
+        )
+
+    def cache_params(self):
+        # Only what changes the labels; thread counts and chunk sizes do not
+        params = {"method": self.method, "level": self.level}
+        if self.method == "sample":
+            params["sample_size"] = self.sample_size
+        elif self.method == "minibatch":
+            params["batch_size"] = self.batch_size
+        return params
+
+
+@dataclass
+class SegmentationResult:
+    segmenter: tuple
+    clusters: np.ndarray
+    fit_rows: int
+    timings: dict = field(default_factory=dict)
+
+
+def segment_features(df, params):
+    # Rows with a NaN in any feature column are left out of clustering
+    return df[params['features_cols']].dropna()
+
+
+def customer_features(df, params):
+    """One row per ``user_id``: the mean of every clustering feature over its transactions.
+
+    ``credit_score``/``yearly_income``/``total_debt`` are constant per customer, so
+    only ``amount`` really changes meaning (mean ticket size). Customers with a
+    feature missing on every transaction are left out of clustering.
+    """
+    features = df[params['features_cols']].astype('float64')
+    return features.groupby(df['user_id'].rename('user_id'), sort=False).mean().dropna()
+
+
+def clustering_features(df, params, config=SegmentationConfig()):
+    if config.level == "customer":
+        return customer_features(df, params)
+    return segment_features(df, params)
+
+
+def broadcast_labels(labels, df, config=SegmentationConfig()):
+    """Labels for every row of ``df`` from ``labels`` indexed like the clustering input.
+
+    Customer labels are looked up by ``user_id``, transaction labels by row index;
+    rows that were not clustered get NaN.
+    """
+    if config.level == "customer":
+        return df['user_id'].map(labels)
+    return labels.reindex(df.index)
+
+
+def fit_segmenter(features, params, config=SegmentationConfig()):
+    """Fit the scaler + clustering model on ``features`` according to ``config``."""
+    if config.method == "sample" and len(features) > config.sample_size:
+        features = features.sample(n=config.sample_size, random_state=params['random_state'])
+    with threadpool_limits(limits=config.n_threads):
+        with stage("scale", rows_in=len(features)) as s:
+            scaler = StandardScaler()
+            X_scaled = scaler.fit_transform(features)
+            s.rows_out = len(X_scaled)
+        if config.method == "minibatch":
+            model = MiniBatchKMeans(n_clusters=params['n_clusters'], random_state=params['random_state'],
+                                    n_init=params['n_init'], batch_size=config.batch_size)
+        else:
+            model = KMeans(n_clusters=params['n_clusters'], random_state=params['random_state'],
+                           n_init=params['n_init'])
+        with stage("kmeans_fit", rows_in=len(X_scaled)) as s:
+            model.fit(X_scaled)
+            s.rows_out = params['n_clusters']
+    return (scaler, model), len(features)
+
+
+def predict_clusters(segmenter, features, config=SegmentationConfig()):
+    scaler, model = segmenter
+    clusters = np.empty(len(features), dtype=np.int32)
+    with threadpool_limits(limits=config.n_threads):
+        for start in range(0, len(features), config.predict_chunk):
+            chunk = features.iloc[start:start + config.predict_chunk]
+            clusters[start:start + len(chunk)] = model.predict(scaler.transform(chunk))
+    return clusters
+
+
+def segment(features, params, config=SegmentationConfig()):
+    """Fit and label every row of ``features``; returns a :class:`SegmentationResult`."""
+    start = time.perf_counter()
+    segmenter, fit_rows = fit_segmenter(features, params, config)
+    fitted = time.perf_counter()
+    if config.method == "full":
+        clusters = segmenter[1].labels_.astype(np.int32) # Already computed for every row
+    else:
+        clusters = predict_clusters(segmenter, features, config)
+    done = time.perf_counter()
+    timings = {"fit": fitted - start, "predict": done - fitted, "total": done - start}
+    logger.info("Segmentation (%s) fitted on %d of %d rows: fit %.2fs, predict %.2fs",
+                config.method, fit_rows, len(features), timings["fit"], timings["predict"])
+    return SegmentationResult(segmenter, clusters, fit_rows, timings)
+
+
+def inertia(segmenter, features, config=SegmentationConfig()):
+    """Sum of squared distances of every row to its closest center (scaled space)."""
+    scaler, model = segmenter
+    total = 0.0
+    with threadpool_limits(limits=config.n_threads):
+        for start in range(0, len(features), config.predict_chunk):
+            total -= model.score(scaler.transform(features.iloc[start:start + config.predict_chunk]))
+    return total
+
+
+def label_agreement(reference, candidate):
+    """Share of rows with the same cluster after the best one-to-one relabelling."""
+    n = int(max(reference.max(), candidate.max())) + 1
+    confusion = np.zeros((n, n), dtype=np.int64)
+    np.add.at(confusion, (reference, candidate), 1)
+    rows, cols = linear_sum_assignment(confusion, maximize=True)
+    return confusion[rows, cols].sum() / len(reference)
+
+
+def compare_to_full(features, params, config, full=None):
+    """Timings and quality of ``config`` against the full K-Means fit.
+
+    ``full`` may be a precomputed full :class:`SegmentationResult`.
+    """
+    full = full or segment(features, params, SegmentationConfig(method="full", n_threads=config.n_threads))
+    fast = segment(features, params, config)
+    full_inertia = inertia(full.segmenter, features, config)
+    fast_inertia = inertia(fast.segmenter, features, config)
+    return {
+        "config": asdict(config),
+        "rows": len(features),
+        "fit_rows": fast.fit_rows,
+        "seconds": fast.timings["total"],
+        "full_seconds": full.timings["total"],
+        "speedup": full.timings["total"] / fast.timings["total"] if fast.timings["total"] else float("inf"),
+        "inertia": fast_inertia,
+        "full_inertia": full_inertia,
+        "inertia_ratio": fast_inertia / full_inertia if full_inertia else float("nan"),
+        "label_agreement": label_agreement(full.clusters, fast.clusters),
+        "adjusted_rand": adjusted_rand_score(full.clusters, fast.clusters),
+    }
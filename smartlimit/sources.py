@@ -0,0 +1,200 @@
+# --- VERİ KAYNAĞI KATMANI ---
+# Transaction shards can come from the GitHub raw prefix (default), a local
+# directory mirror or a glob. Shards are fetched and parsed in parallel and every
+# shard gets its own timing report; a failing shard is skipped, not fatal.
+
+import glob
+import logging
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+import pandas as pd
+
+from smartlimit.instrumentation import record
+from smartlimit.schema import concat_frames
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_REMOTE_PREFIX = "https://raw.githubusercontent.com/tturan6446/ITUbitirme/main/"
+DEFAULT_SHARD_NAMES = [f"merged_data_part{i}.csv" for i in range(1, 11)]
+DEFAULT_PREDICTION_URL = "https://raw.githubusercontent.com/tturan6446/veri/main/prediction_output%20(3).csv"
+
+# Environment overrides, e.g. SMARTLIMIT_DATA_SOURCE=./mirror for offline runs
+SOURCE_ENV_VAR = "SMARTLIMIT_DATA_SOURCE"
+PREDICTION_ENV_VAR = "SMARTLIMIT_PREDICTION_SOURCE"
+WORKERS_ENV_VAR = "SMARTLIMIT_LOAD_WORKERS"
+EXECUTOR_ENV_VAR = "SMARTLIMIT_LOAD_EXECUTOR"
+
+SHARD_PATTERN = "merged_data_part*.csv"
+
+
+def is_remote(location):
+    return location.startswith(("http://", "https://"))
+
+
+def _natural_key(text):
+    # merged_data_part10.csv must sort after merged_data_part9.csv
+    return [int(part) if part.isdigit() else part for part in re.split(r"(\d+)", text)]
+
+
+@dataclass(frozen=True)
+class Shard:
+    name: str
+    location: str
+
+    @property
+    def is_remote(self):
+        return is_remote(self.location)
+
+
+@dataclass
+class ShardReport:
+    name: str
+    location: str
+    seconds: float
+    rows: int = 0
+    error: str | None = None
+
+    @property
+    def ok(self):
+        return self.error is None
+
+
+@dataclass
+class LoadResult:
+    frames: list = field(default_factory=list)
+    reports: list = field(default_factory=list)
+    seconds: float = 0.0
+
+    @property
+    def failed(self):
+        return [report for report in self.reports if not report.ok]
+
+    def concat(self):
+        return concat_frames(self.frames)
+
+    def summary(self):
+        lines = [
+            f"{report.name}: {report.seconds:.2f}s, {report.rows:,} satır"
+            if report.ok else f"{report.name}: HATA ({report.error})"
+            for report in self.reports
+        ]
+        lines.append(f"Toplam: {self.seconds:.2f}s, {sum(r.rows for r in self.reports):,} satır")
+        return "\n".join(lines)
+
+
+def _read_shard(shard, read_csv_kwargs):
+    # Top-level so that ProcessPoolExecutor can pickle it
+    start = time.perf_counter()
+    try:
+        df = pd.read_csv(shard.location, **read_csv_kwargs)
+    except Exception as e:
+        return None, ShardReport(shard.name, shard.location, time.perf_counter() - start, error=str(e))
+    return df, ShardReport(shard.name, shard.location, time.perf_counter() - start, rows=len(df))
+
+
+class ShardSource:
+    """An ordered list of CSV shards resolved from a directory, glob or URL prefix."""
+
+    def __init__(self, shards, spec=None):
+        self.shards = list(shards)
+        self.spec = spec
+
+    @classmethod
+    def from_spec(cls, spec=None, shard_names=None):
+        """Resolve ``spec`` (or ``$SMARTLIMIT_DATA_SOURCE``, or the GitHub prefix).
+
+        * ``http(s)://...`` prefix: ``shard_names`` appended to it (a full
+          ``.csv`` URL is taken as a single shard).
+        * existing directory: its ``merged_data_part*.csv`` files, or every
+          ``*.csv`` file if there are none.
+        * anything else is treated as a glob pattern (a plain file path matches
+          itself).
+        """
+        spec = spec or os.environ.get(SOURCE_ENV_VAR) or DEFAULT_REMOTE_PREFIX
+
+        if is_remote(spec):
+            if spec.lower().endswith(".csv"):
+                return cls([Shard(spec.rsplit("/", 1)[-1], spec)], spec)
+            prefix = spec if spec.endswith("/") else spec + "/"
+            names = shard_names or DEFAULT_SHARD_NAMES
+            return cls([Shard(name, prefix + name) for name in names], spec)
+
+        if os.path.isdir(spec):
+            if shard_names:
+                paths = [os.path.join(spec, name) for name in shard_names]
+            else:
+                paths = glob.glob(os.path.join(spec, SHARD_PATTERN)) or glob.glob(os.path.join(spec, "*.csv"))
+        else:
+            paths = glob.glob(os.path.expanduser(spec))
+
+        paths = sorted(paths, key=lambda p: _natural_key(os.path.basename(p)))
+        return cls([Shard(os.path.basename(p), p) for p in paths], spec)
+
+    def __len__(self):
+        return len(self.shards)
+
+    def load(self, max_workers=None, executor=None, read_csv_kwargs=None):
+        """Read every shard in parallel; frames keep the shard order.
+
+        ``executor`` is ``"thread"`` (default, best for downloads) or
+        ``"process"`` (CPU-bound parsing of large local files).
+        """
+        read_csv_kwargs = read_csv_kwargs or {}
+        executor = executor or os.environ.get(EXECUTOR_ENV_VAR, "thread")
+        if max_workers is None:
+            # Downloads are I/O bound, so threads may outnumber cores; processes may not
+            default = (os.cpu_count() or 1) if executor == "process" else 8
+            max_workers = int(os.environ.get(WORKERS_ENV_VAR, 0)) or default
+        max_workers = max(1, min(max_workers, len(self.shards) or 1))
+
+        pool_cls = ProcessPoolExecutor if executor == "process" else ThreadPoolExecutor
+        start = time.perf_counter()
+        result = LoadResult()
+        with pool_cls(max_workers=max_workers) as pool:
+            futures = [pool.submit(_read_shard, shard, read_csv_kwargs) for shard in self.shards]
+            for future in futures:
+                df, report = future.result()
+                if report.ok:
+                    result.frames.append(df)
+                    logger.debug("Loaded %s in %.2fs (%d rows)", report.name, report.seconds, report.rows)
+                else:
+                    logger.warning("Skipping %s after %.2fs: %s", report.name, report.seconds, report.error)
+                # Download + parse of one shard (shards overlap in time, so these do not add up)
+                record(report.name, report.seconds, rows_out=report.rows)
+                result.reports.append(report)
+        result.seconds = time.perf_counter() - start
+        logger.info("Loaded %d/%d shards in %.2fs with %d %s workers",
+                    len(result.frames), len(self.shards), result.seconds, max_workers, executor)
+        return result
+
+    def iter_chunks(self, chunksize, read_csv_kwargs=None, reports=None):
+        """Yield ``(shard, chunk)`` one shard after another with bounded memory.
+
+        A shard that fails is reported (appended to ``reports``) and skipped,
+        like in :meth:`load`; chunks it already yielded stay yielded.
+        """
+        read_csv_kwargs = read_csv_kwargs or {}
+        for shard in self.shards:
+            start = time.perf_counter()
+            rows = 0
+            try:
+                with pd.read_csv(shard.location, chunksize=chunksize, **read_csv_kwargs) as reader:
+                    for chunk in reader:
+                        rows += len(chunk)
+                        yield shard, chunk
+            except Exception as e:
+                report = ShardReport(shard.name, shard.location, time.perf_counter() - start, rows, str(e))
+                logger.warning("Skipping rest of %s after %d rows: %s", shard.name, rows, e)
+            else:
+                report = ShardReport(shard.name, shard.location, time.perf_counter() - start, rows)
+                logger.info("Streamed %s in %.2fs (%d rows)", shard.name, report.seconds, rows)
+            if reports is not None:
+                reports.append(report)
+
+
+def resolve_prediction_location(location=None):
+    return location or os.environ.get(PREDICTION_ENV_VAR) or DEFAULT_PREDICTION_URL
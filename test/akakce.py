@@ -0,0 +1,467 @@
+# --- AKAKÇE TARAYICI ---
+# Result pages of one product query are fetched concurrently by a bounded pool of
+# workers instead of one Chrome instance in sequence:
+#   - "http":    a requests session per worker, cards parsed from the HTML;
+#   - "browser": a Chrome driver per worker, with explicit waits (document ready,
+#                then "li.w count and page height stable") instead of fixed sleeps.
+# Pages are requested in order, at most ``workers`` at a time; the first empty
+# page stops the crawl, so the rows are the same as the sequential loop's. Rows
+# are appended to the CSV as soon as every page before them has completed.
+#
+# Cards are read from a loaded page in one of three ways (``ayiklama``):
+#   - "toplu": one execute_script call returning every card as JSON (default);
+#   - "html":  page_source parsed in Python (kartlari_ayikla), one call as well;
+#   - "kart":  the original per-card find_element/get_attribute calls, which
+#              cost several WebDriver round trips per card.
+# All three produce the same rows.
+
+import csv
+import json
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import nullcontext
+from html.parser import HTMLParser
+from urllib.parse import urljoin
+
+from onbellek import ozet
+
+DEFAULT_BASE_URL = "https://www.akakce.com"
+USER_AGENT = ("Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 "
+              "(KHTML, like Gecko) Chrome/117.0.0.0 Safari/537.36")
+KOLONLAR = ["Ürün", "Fiyat", "Satıcı", "Marka", "Satıcı Linki"]
+# Tried in this order; the first one with text wins
+FIYAT_SECICILERI = ["span.db_v9", "span.pb_v8", "span.pt_v8", "strong.pt_v8", "div.price"]
+MAX_SAYFA = 10
+
+
+def sayfa_url(base_url, urun, sayfa_no):
+    return f"{base_url}/{urun},{sayfa_no}.html" if sayfa_no > 1 else f"{base_url}/{urun}.html"
+
+
+def fiyat_sec(metinler):
+    """The price of a card from the text of each price selector's first match
+    (``None`` = no match), with the fallbacks of the original loop."""
+    fiyat = "Fiyat yok"
+    for metin in metinler:
+        if metin is None:
+            continue
+        fiyat = metin.strip()
+        if fiyat:
+            break
+    return fiyat
+
+
+def kart_satirlari(urun_adi, fiyat, satici_adi, marka, linkler):
+    """Rows of one card: one per seller link, or a single row with "-"."""
+    return [{"Ürün": urun_adi, "Fiyat": fiyat, "Satıcı": satici_adi, "Marka": marka, "Satıcı Linki": link}
+            for link in (linkler or ["-"])]
+
+
+# --- HTML'DEN KART AYIKLAMA ---
+
+_BOS_ETIKETLER = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "track",
+                  "wbr"}
+_FIYAT_ETIKETLERI = [tuple(secici.split(".")) for secici in FIYAT_SECICILERI]
+_YOK = object()
+
+
+class _KartAyiklayici(HTMLParser):
+    """Single pass over the page with the selector semantics of ``verileri_cek``."""
+
+    def __init__(self, url):
+        super().__init__(convert_charrefs=True)
+        self.url = url
+        self.satirlar = []
+        self._yigin = [] # Open elements: (tag, role)
+        self._kart = None
+        self._fiyatlar = [] # Open price elements: (stack depth, text parts)
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        siniflar = (attrs.get("class") or "").split()
+        kart, rol = self._kart, None
+        if kart is None:
+            if tag == "li" and "w" in siniflar:
+                self._kart = {"ad": _YOK, "fiyatlar": [None] * len(_FIYAT_ETIKETLERI), "linkler": [],
+                              "marka": attrs.get("data-mk"), "satici": attrs.get("data-mn"), "link_kutusu": 0}
+                rol = "kart"
+        else:
+            if tag == "a" and "pw_v8" in siniflar and kart["ad"] is _YOK:
+                kart["ad"] = attrs.get("title")
+            for i, (etiket, sinif) in enumerate(_FIYAT_ETIKETLERI):
+                # find_element: only the first match of each selector counts
+                if tag == etiket and sinif in siniflar and kart["fiyatlar"][i] is None and tag not in _BOS_ETIKETLER:
+                    kart["fiyatlar"][i] = parcalar = []
+                    self._fiyatlar.append((len(self._yigin), parcalar))
+            if tag == "a" and kart["link_kutusu"]:
+                href = attrs.get("href")
+                # WebElement.get_attribute("href") is the resolved URL
+                kart["linkler"].append(urljoin(self.url, href) if href is not None else None)
+            if tag == "div" and "p_w_v9" in siniflar:
+                kart["link_kutusu"] += 1
+                rol = "link_kutusu"
+        if tag not in _BOS_ETIKETLER:
+            self._yigin.append((tag, rol))
+
+    def handle_endtag(self, tag):
+        for derinlik in range(len(self._yigin) - 1, -1, -1):
+            if self._yigin[derinlik][0] == tag:
+                break
+        else:
+            return # Stray end tag
+        # Close the element and everything left open inside it
+        self._fiyatlar = [(d, parcalar) for d, parcalar in self._fiyatlar if d < derinlik]
+        for _, rol in reversed(self._yigin[derinlik:]):
+            if rol == "link_kutusu":
+                self._kart["link_kutusu"] -= 1
+            elif rol == "kart":
+                self._karti_bitir()
+        del self._yigin[derinlik:]
+
+    def handle_data(self, data):
+        for _, parcalar in self._fiyatlar:
+            parcalar.append(data)
+
+    def close(self):
+        super().close()
+        if self._kart is not None: # Unclosed card at the end of the document
+            self._karti_bitir()
+
+    def _karti_bitir(self):
+        kart, self._kart = self._kart, None
+        # WebElement.text: rendered text, whitespace collapsed
+        fiyat = fiyat_sec(None if parcalar is None else " ".join("".join(parcalar).split())
+                          for parcalar in kart["fiyatlar"])
+        self.satirlar.extend(kart_satirlari("Ürün adı yok" if kart["ad"] is _YOK else kart["ad"], fiyat,
+                                            kart["satici"] or "Satıcı yok", kart["marka"] or "Marka yok",
+                                            kart["linkler"]))
+
+
+def kartlari_ayikla(html, url=""):
+    """Rows of every ``li.w`` card in ``html``, as ``verileri_cek`` returns them for the same page."""
+    ayiklayici = _KartAyiklayici(url)
+    ayiklayici.feed(html)
+    ayiklayici.close()
+    return ayiklayici.satirlar
+
+
+# --- SELENIUM ---
+
+AYIKLAMA_MODLARI = ("toplu", "html", "kart")
+
+# Every card in one round trip; mirrors the selectors of verileri_cek_kart
+_KARTLAR_JS = """
+const fiyatSecicileri = arguments[0];
+return JSON.stringify(Array.from(document.querySelectorAll('li.w'), kart => {
+    const ad = kart.querySelector('a.pw_v8');
+    return {
+        bulundu: ad !== null,
+        ad: ad && ad.getAttribute('title'),
+        fiyatlar: fiyatSecicileri.map(secici => {
+            const e = kart.querySelector(secici);
+            return e && e.innerText;
+        }),
+        marka: kart.getAttribute('data-mk'),
+        satici: kart.getAttribute('data-mn'),
+        linkler: Array.from(kart.querySelectorAll('div.p_w_v9 a'),
+                            a => a.getAttribute('href') === null ? null : a.href),
+    };
+}));
+"""
+
+
+def verileri_cek(driver, ayiklama="toplu"):
+    """Rows of every ``li.w`` card on the loaded page (see ``AYIKLAMA_MODLARI``)."""
+    if ayiklama == "toplu":
+        return verileri_cek_toplu(driver)
+    if ayiklama == "html":
+        return kartlari_ayikla(driver.page_source, driver.current_url)
+    if ayiklama == "kart":
+        return verileri_cek_kart(driver)
+    raise ValueError(f"Unknown extraction mode {ayiklama!r}, expected one of {AYIKLAMA_MODLARI}")
+
+
+def verileri_cek_toplu(driver):
+    data = []
+    for kart in json.loads(driver.execute_script(_KARTLAR_JS, FIYAT_SECICILERI)):
+        data.extend(kart_satirlari(kart["ad"] if kart["bulundu"] else "Ürün adı yok", fiyat_sec(kart["fiyatlar"]),
+                                   kart["satici"] or "Satıcı yok", kart["marka"] or "Marka yok", kart["linkler"]))
+    return data
+
+
+def verileri_cek_kart(driver):
+    from selenium.webdriver.common.by import By
+
+    kartlar = driver.find_elements(By.CSS_SELECTOR, "li.w")
+    data = []
+
+    for kart in kartlar:
+        try:
+            urun_adi = kart.find_element(By.CSS_SELECTOR, "a.pw_v8").get_attribute("title")
+        except Exception:
+            urun_adi = "Ürün adı yok"
+
+        fiyat = "Fiyat yok"
+        for fiyat_selector in FIYAT_SECICILERI:
+            try:
+                fiyat = kart.find_element(By.CSS_SELECTOR, fiyat_selector).text.strip()
+                if fiyat:
+                    break
+            except Exception:
+                continue
+
+        marka = kart.get_attribute("data-mk") or "Marka yok"
+        satici_adi = kart.get_attribute("data-mn") or "Satıcı yok"
+
+        linkler = [link.get_attribute("href") for link in kart.find_elements(By.CSS_SELECTOR, "div.p_w_v9 a")]
+        data.extend(kart_satirlari(urun_adi, fiyat, satici_adi, marka, linkler))
+    return data
+
+
+def chrome_driver(headless=False):
+    from selenium import webdriver
+    from selenium.webdriver.chrome.options import Options
+
+    options = Options()
+    options.add_argument("--disable-gpu")
+    options.add_argument("--no-sandbox")
+    options.add_argument("start-maximized")
+    if headless:
+        options.add_argument("--headless=new")
+    options.add_argument(f"user-agent={USER_AGENT}")
+    return webdriver.Chrome(options=options)
+
+
+class _SabitlendiMi:
+    """Wait condition: ``li.w`` count and page height unchanged for ``sure`` seconds."""
+
+    def __init__(self, sure):
+        self.sure = sure
+        self._durum, self._since = None, None
+
+    def __call__(self, driver):
+        durum = driver.execute_script(
+            "return [document.querySelectorAll('li.w').length, document.body.scrollHeight];")
+        simdi = time.monotonic()
+        if durum != self._durum:
+            self._durum, self._since = durum, simdi
+            return False
+        return simdi - self._since >= self.sure
+
+
+def sayfayi_yukle(driver, url, zaman_asimi=20, sabit_sure=0.75, kaydirma=10):
+    """Open ``url`` and scroll until no new cards appear; replaces ``sleep(4)`` and
+    ``scroll_page``'s ``sleep(2)`` per step. Returns as soon as the page is stable."""
+    from selenium.common.exceptions import TimeoutException
+    from selenium.webdriver.support.ui import WebDriverWait
+
+    driver.get(url)
+    WebDriverWait(driver, zaman_asimi).until(
+        lambda d: d.execute_script("return document.readyState") == "complete")
+    for _ in range(kaydirma):
+        onceki = driver.execute_script(
+            "return [document.querySelectorAll('li.w').length, document.body.scrollHeight];")
+        driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+        try:
+            WebDriverWait(driver, zaman_asimi, poll_frequency=0.25).until(_SabitlendiMi(sabit_sure))
+        except TimeoutException:
+            break # Keeps growing (infinite feed); take what is there
+        if driver.execute_script(
+                "return [document.querySelectorAll('li.w').length, document.body.scrollHeight];") == onceki:
+            break
+
+
+# --- İŞÇİLER ---
+
+class HttpIsci:
+    """Fetches pages with one ``requests`` session per thread.
+
+    With an ``onbellek`` (onbellek.SayfaOnbellegi) fresh pages are not requested
+    and stale ones are revalidated instead of parsed again when unchanged.
+    """
+
+    def __init__(self, zaman_asimi=20, deneme=2, onbellek=None):
+        self.zaman_asimi = zaman_asimi
+        self.deneme = deneme
+        self.onbellek = onbellek
+        self._yerel = threading.local()
+        self._oturumlar = []
+        self._kilit = threading.Lock()
+
+    def _oturum(self):
+        import requests
+
+        oturum = getattr(self._yerel, "oturum", None)
+        if oturum is None:
+            oturum = self._yerel.oturum = requests.Session()
+            oturum.headers["User-Agent"] = USER_AGENT
+            with self._kilit:
+                self._oturumlar.append(oturum)
+        return oturum
+
+    def __call__(self, url):
+        import requests
+
+        onbellek = self.onbellek
+        kayit = onbellek.oku(url) if onbellek is not None else None
+        if kayit is not None and onbellek.taze_mi(kayit):
+            onbellek.say("taze")
+            return kayit["satirlar"]
+        basliklar = {}
+        if kayit is not None and kayit["etag"]:
+            basliklar["If-None-Match"] = kayit["etag"]
+        if kayit is not None and kayit["last_modified"]:
+            basliklar["If-Modified-Since"] = kayit["last_modified"]
+
+        for deneme in range(self.deneme + 1):
+            try:
+                yanit = self._oturum().get(url, headers=basliklar, timeout=self.zaman_asimi)
+                if yanit.status_code == 304 and kayit is not None:
+                    onbellek.yenile(kayit)
+                    onbellek.say("dogrulandi")
+                    return kayit["satirlar"]
+                if yanit.status_code != 404: # 404: past the last page, no cards
+                    yanit.raise_for_status()
+                break
+            except requests.RequestException:
+                if deneme == self.deneme:
+                    raise
+                time.sleep(0.5 * 2 ** deneme)
+
+        icerik_ozeti = ozet(yanit.content)
+        if kayit is not None and kayit["ozet"] == icerik_ozeti:
+            onbellek.yenile(kayit)
+            onbellek.say("dogrulandi")
+            return kayit["satirlar"]
+        satirlar = [] if yanit.status_code == 404 else kartlari_ayikla(yanit.text, yanit.url)
+        if onbellek is not None:
+            onbellek.yaz(url, satirlar, yanit.headers.get("ETag"), yanit.headers.get("Last-Modified"), icerik_ozeti)
+            onbellek.say("cekildi")
+        return satirlar
+
+    def kapat(self):
+        for oturum in self._oturumlar:
+            oturum.close()
+
+
+class TarayiciIsci:
+    """Loads pages in one Chrome driver per thread (started on first use).
+
+    With an ``onbellek`` pages younger than its TTL are not loaded again.
+    """
+
+    def __init__(self, headless=False, ayiklama="toplu", onbellek=None, **bekleme):
+        self.headless = headless
+        self.ayiklama = ayiklama
+        self.onbellek = onbellek
+        self.bekleme = bekleme
+        self._yerel = threading.local()
+        self._suruculer = []
+        self._kilit = threading.Lock()
+
+    def _surucu(self):
+        driver = getattr(self._yerel, "driver", None)
+        if driver is None:
+            driver = self._yerel.driver = chrome_driver(self.headless)
+            with self._kilit:
+                self._suruculer.append(driver)
+        return driver
+
+    def __call__(self, url):
+        onbellek = self.onbellek
+        if onbellek is not None:
+            kayit = onbellek.oku(url)
+            if onbellek.taze_mi(kayit):
+                onbellek.say("taze")
+                return kayit["satirlar"]
+        driver = self._surucu()
+        sayfayi_yukle(driver, url, **self.bekleme)
+        satirlar = verileri_cek(driver, self.ayiklama)
+        if onbellek is not None:
+            onbellek.yaz(url, satirlar)
+            onbellek.say("cekildi")
+        return satirlar
+
+    def kapat(self):
+        for driver in self._suruculer:
+            driver.quit()
+
+
+# --- TARAMA ---
+
+class CsvAkisi:
+    """Appends each completed page to the CSV, in page order."""
+
+    def __init__(self, path):
+        self.f = open(path, "w", newline="", encoding="utf-8")
+        self.writer = csv.DictWriter(self.f, fieldnames=KOLONLAR)
+        self.writer.writeheader()
+        self.f.flush()
+
+    def yaz(self, satirlar):
+        self.writer.writerows(satirlar)
+        self.f.flush()
+
+    def close(self):
+        self.f.close()
+
+
+def tara(urun, isci, workers=4, max_sayfa=MAX_SAYFA, base_url=DEFAULT_BASE_URL, csv_path=None, log=print,
+         pool=None):
+    """Rows of every result page of ``urun`` until the first empty page.
+
+    ``isci(url)`` returns the rows of one page and is called from up to
+    ``workers`` threads. With ``csv_path`` the rows are streamed to that file
+    while the crawl runs. Passing a ``pool`` keeps its threads (and so their
+    sessions or drivers) across several crawls.
+    """
+    akis = CsvAkisi(csv_path) if csv_path else None
+    sonuclar = {} # page -> rows, completed but not yet written
+    satirlar = []
+    sonraki_yazilacak, sonraki_gonderilecek = 1, 1
+    bos_sayfa = None
+    try:
+        with nullcontext(pool) if pool is not None else ThreadPoolExecutor(max_workers=workers) as pool:
+            bekleyen = {}
+            while True:
+                # Keep the pool full, but never ask for pages after a known empty one
+                while (len(bekleyen) < workers and sonraki_gonderilecek <= max_sayfa
+                       and (bos_sayfa is None or sonraki_gonderilecek < bos_sayfa)):
+                    url = sayfa_url(base_url, urun, sonraki_gonderilecek)
+                    log(f"{sonraki_gonderilecek}. sayfa çekiliyor: {url}")
+                    bekleyen[pool.submit(_zamanla, isci, url)] = sonraki_gonderilecek
+                    sonraki_gonderilecek += 1
+                if not bekleyen:
+                    break
+                bitenler, _ = wait(bekleyen, return_when=FIRST_COMPLETED)
+                for future in bitenler:
+                    sayfa_no = bekleyen.pop(future)
+                    try:
+                        sayfa_satirlari, saniye = future.result()
+                    except Exception:
+                        for diger in bekleyen:
+                            diger.cancel()
+                        raise
+                    if not sayfa_satirlari and (bos_sayfa is None or sayfa_no < bos_sayfa):
+                        bos_sayfa = sayfa_no
+                        log(f"{sayfa_no}. sayfa boş, tarama durduruldu.")
+                    elif sayfa_satirlari:
+                        log(f"{sayfa_no}. sayfa: {len(sayfa_satirlari)} satır ({saniye:.2f}s)")
+                    sonuclar[sayfa_no] = sayfa_satirlari
+                # Flush the completed prefix; pages after the first empty one are dropped
+                while sonraki_yazilacak in sonuclar and (bos_sayfa is None or sonraki_yazilacak < bos_sayfa):
+                    sayfa_satirlari = sonuclar.pop(sonraki_yazilacak)
+                    satirlar.extend(sayfa_satirlari)
+                    if akis is not None:
+                        akis.yaz(sayfa_satirlari)
+                    sonraki_yazilacak += 1
+    finally:
+        if akis is not None:
+            akis.close()
+    return satirlar
+
+
+def _zamanla(isci, url):
+    start = time.perf_counter()
+    return isci(url), time.perf_counter() - start
@@ -0,0 +1,54 @@
+# --- Tarama benchmark'ı: sıralı vs eşzamanlı sayfa çekme ---
+# python test/bench_crawl.py [--pages 10] [--cards 40] [--delay 1.0] [--workers 1 4 8]
+# Crawls the fixture server (test/fixture_server.py) with each pool size and checks
+# that every run returns the same rows in the same order as the sequential one.
+# --delay stands in for the time one page takes to load; the old loop also slept
+# 4s per page plus 2s per scroll step, which is printed as its lower bound.
+
+import argparse
+import os
+import tempfile
+import time
+
+import pandas as pd
+
+from akakce import KOLONLAR, HttpIsci, tara
+from fixture_server import calistir
+
+ESKI_BEKLEME = 4 + 2 # sleep(4) + at least one scroll_page sleep(2) per page
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Akakçe tarayıcı benchmark'ı")
+    parser.add_argument("--pages", type=int, default=10)
+    parser.add_argument("--cards", type=int, default=40)
+    parser.add_argument("--delay", type=float, default=1.0)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 8])
+    args = parser.parse_args()
+
+    print(f"{'workers':>8}{'seconds':>9}{'rows':>7}{'speed-up':>10}{'same rows':>11}")
+    with calistir(pages=args.pages, cards=args.cards, delay=args.delay) as base_url, \
+            tempfile.TemporaryDirectory() as directory:
+        referans, referans_saniye = None, None
+        for workers in args.workers:
+            isci = HttpIsci()
+            csv_path = os.path.join(directory, f"ps5-{workers}.csv")
+            start = time.perf_counter()
+            try:
+                satirlar = tara("ps5", isci, workers, args.pages + 1, base_url, csv_path, log=lambda _: None)
+            finally:
+                isci.kapat()
+            saniye = time.perf_counter() - start
+            # The streamed CSV must hold exactly the returned rows
+            akis = pd.read_csv(csv_path, dtype=str, keep_default_na=False)
+            assert akis.to_dict("records") == pd.DataFrame(satirlar, columns=KOLONLAR).fillna("").to_dict("records")
+            if referans is None:
+                referans, referans_saniye = satirlar, saniye
+            print(f"{workers:>8}{saniye:>9.2f}{len(satirlar):>7}{referans_saniye / saniye:>9.1f}x"
+                  f"{str(satirlar == referans):>11}")
+    print(f"\nEski döngünün sabit beklemesi: en az {(args.pages + 1) * ESKI_BEKLEME}s "
+          f"({args.pages + 1} sayfa x {ESKI_BEKLEME}s)")
+
+
+if __name__ == "__main__":
+    main()
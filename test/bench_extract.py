@@ -0,0 +1,91 @@
+# --- Kart ayıklama benchmark'ı: kart başına çağrı vs tek seferde ---
+# python test/bench_extract.py [--pages 5] [--cards 40 200] [--repeat 3] [--no-browser]
+# Saves fixture pages (test/fixture_server.py), then times every extraction mode
+# of verileri_cek on each page: "kart" (per-card WebDriver calls), "toplu" (one
+# execute_script) and "html" (page_source + kartlari_ayikla), with the number of
+# WebDriver commands each one sends. Every mode must return the same rows. The
+# pure-Python parser is also timed on the files alone; without Selenium/Chrome
+# only that part runs.
+
+import argparse
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from akakce import AYIKLAMA_MODLARI, chrome_driver, kartlari_ayikla, verileri_cek
+from fixture_server import kaydet
+
+FIXTURE_DIR = os.path.join(tempfile.gettempdir(), "akakce-fixtures")
+
+
+def best_of(repeat, function):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        times.append(time.perf_counter() - start)
+    return min(times) * 1000, result
+
+
+class KomutSayaci:
+    """Counts the WebDriver commands (HTTP round trips to chromedriver) of a driver."""
+
+    def __init__(self, driver):
+        self.sayi = 0
+        execute = driver.execute
+
+        def sayan(*args, **kwargs):
+            self.sayi += 1
+            return execute(*args, **kwargs)
+
+        driver.execute = sayan # WebElement calls go through the parent driver too
+
+
+def tarayici_ac():
+    try:
+        return chrome_driver(headless=True)
+    except Exception as e: # selenium missing, no Chrome, ...
+        print(f"Tarayıcı açılamadı ({type(e).__name__}: {e}); yalnızca HTML ayrıştırıcı ölçülüyor")
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Akakçe kart ayıklama benchmark'ı")
+    parser.add_argument("--pages", type=int, default=5)
+    parser.add_argument("--cards", type=int, nargs="+", default=[40, 200])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--fixtures", default=FIXTURE_DIR, help="Fixture pages are written here")
+    parser.add_argument("--no-browser", action="store_true", help="Only time the HTML parser")
+    args = parser.parse_args()
+
+    driver = None if args.no_browser else tarayici_ac()
+    sayac = KomutSayaci(driver) if driver is not None else None
+    try:
+        print(f"{'cards':>6}{'page':>6}{'rows':>6}{'parse ms':>10}"
+              + "".join(f"{mod + ' ms':>10}{'calls':>7}" for mod in AYIKLAMA_MODLARI if driver is not None)
+              + (f"{'same':>6}" if driver is not None else ""))
+        for cards in args.cards:
+            paths = kaydet(os.path.join(args.fixtures, str(cards)), "ps5", args.pages, cards)
+            for sayfa_no, path in enumerate(paths, 1):
+                html = Path(path).read_text(encoding="utf-8")
+                url = Path(path).resolve().as_uri()
+                parse_ms, beklenen = best_of(args.repeat, lambda: kartlari_ayikla(html, url))
+                satir = f"{cards:>6}{sayfa_no:>6}{len(beklenen):>6}{parse_ms:>10.2f}"
+                if driver is not None:
+                    driver.get(url)
+                    ayni = True
+                    for mod in AYIKLAMA_MODLARI:
+                        sayac.sayi = 0
+                        ms, satirlar = best_of(args.repeat, lambda: verileri_cek(driver, mod))
+                        satir += f"{ms:>10.1f}{sayac.sayi // args.repeat:>7}"
+                        ayni &= satirlar == beklenen
+                    satir += f"{str(ayni):>6}"
+                print(satir)
+    finally:
+        if driver is not None:
+            driver.quit()
+
+
+if __name__ == "__main__":
+    main()
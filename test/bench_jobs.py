@@ -0,0 +1,114 @@
+# --- İş çalıştırıcı benchmark'ı: sayfa önbelleği ve PDF yazıcı ---
+# python test/bench_jobs.py [--queries ps5 xbox switch] [--delay 0.5] [--rows 1000 10000 50000]
+# 1) Runs the multi-query job against the fixture server three times: with an
+#    empty cache, again within the TTL (nothing is requested) and with an expired
+#    TTL (every page revalidated by ETag, nothing parsed); all three must give
+#    the same tables.
+# 2) Times the paginated PDF writer (test/rapor.py) against the original
+#    iterrows + bordered-cell loop for growing row counts (needs fpdf).
+
+import argparse
+import importlib.util
+import os
+import tempfile
+import time
+
+import pandas as pd
+
+from akakce import KOLONLAR, HttpIsci, kartlari_ayikla
+from fixture_server import calistir, sayfa_html
+from onbellek import SayfaOnbellegi
+from rapor import pdf_yaz, tr_encode
+from test2 import isleri_calistir
+
+
+def pdf_yaz_satir_satir(df, baslik, path):
+    """The original writer: df.iterrows and one bordered cell per value."""
+    from fpdf import FPDF
+
+    pdf = FPDF()
+    pdf.add_page()
+    pdf.set_font("Helvetica", size=10)
+    pdf.cell(200, 10, tr_encode(baslik), align='C')
+    pdf.ln()
+    pdf.set_font("Helvetica", 'B', 8)
+    for header in KOLONLAR:
+        pdf.cell(38, 8, tr_encode(header), 1, align='C')
+    pdf.ln()
+    pdf.set_font("Helvetica", size=8)
+    for index, row in df.fillna("").iterrows():
+        pdf.cell(38, 6, tr_encode(row["Ürün"][:25]), 1)
+        pdf.cell(38, 6, tr_encode(row["Fiyat"]), 1)
+        pdf.cell(38, 6, tr_encode(row["Satıcı"]), 1)
+        pdf.cell(38, 6, tr_encode(row["Marka"]), 1)
+        pdf.cell(38, 6, tr_encode(row["Satıcı Linki"][:25]), 1)
+        pdf.ln()
+    pdf.output(path)
+    return pdf.page_no()
+
+
+def ornek_tablo(satir_sayisi):
+    """``satir_sayisi`` rows repeated from a 200-card fixture page."""
+    df = pd.DataFrame(kartlari_ayikla(sayfa_html("ps5", 1, kart_sayisi=200), "https://www.akakce.com/ps5.html"),
+                      columns=KOLONLAR)
+    return df.iloc[[i % len(df) for i in range(satir_sayisi)]].reset_index(drop=True)
+
+
+def onbellek_bench(args, directory):
+    print(f"{'run':<12}{'seconds':>9}{'fresh':>7}{'304/same':>10}{'fetched':>9}{'same':>6}")
+    with calistir(pages=args.pages, cards=args.cards, delay=args.delay) as base_url:
+        referans = None
+        for ad, ttl in (("cold", 3600), ("within TTL", 3600), ("expired", 0)):
+            onbellek = SayfaOnbellegi(os.path.join(directory, "cache"), ttl)
+            isci = HttpIsci(onbellek=onbellek)
+            start = time.perf_counter()
+            try:
+                sonuclar = isleri_calistir(args.queries, isci, args.workers, args.pages + 1, base_url,
+                                           os.path.join(directory, "out"), "parquet", pdf=False, log=lambda _: None)
+            finally:
+                isci.kapat()
+            saniye = time.perf_counter() - start
+            tablolar = {urun: df.to_dict("records") for urun, df in sonuclar.items()}
+            referans = referans or tablolar
+            sayac = onbellek.sayac
+            print(f"{ad:<12}{saniye:>9.2f}{sayac['taze']:>7}{sayac['dogrulandi']:>10}{sayac['cekildi']:>9}"
+                  f"{str(tablolar == referans):>6}")
+
+
+def pdf_bench(args, directory):
+    if importlib.util.find_spec("fpdf") is None:
+        print("\nfpdf yok: PDF yazıcı ölçülmedi")
+        return
+    print(f"\n{'rows':>8}{'pages':>7}{'paged s':>9}{'iterrows s':>12}{'speed-up':>10}")
+    for rows in args.rows:
+        df = ornek_tablo(rows)
+        start = time.perf_counter()
+        sayfa = pdf_yaz(df, "PS5 Arama Sonuçları", os.path.join(directory, "yeni.pdf"))
+        yeni = time.perf_counter() - start
+        if rows <= args.max_old_rows:
+            start = time.perf_counter()
+            pdf_yaz_satir_satir(df, "PS5 Arama Sonuçları", os.path.join(directory, "eski.pdf"))
+            eski = time.perf_counter() - start
+            print(f"{rows:>8,}{sayfa:>7}{yeni:>9.2f}{eski:>12.2f}{eski / yeni:>9.1f}x")
+        else:
+            print(f"{rows:>8,}{sayfa:>7}{yeni:>9.2f}{'-':>12}{'-':>10}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Akakçe iş çalıştırıcı benchmark'ı")
+    parser.add_argument("--queries", nargs="+", default=["ps5", "xbox", "switch"])
+    parser.add_argument("--pages", type=int, default=5)
+    parser.add_argument("--cards", type=int, default=40)
+    parser.add_argument("--delay", type=float, default=0.5)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--rows", type=int, nargs="+", default=[1_000, 10_000, 50_000])
+    parser.add_argument("--max-old-rows", type=int, default=50_000, help="Skip the original writer above this")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        onbellek_bench(args, directory)
+        pdf_bench(args, directory)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+# --- AKAKÇE FIXTURE SUNUCUSU ---
+# python test/fixture_server.py [--port 8765] [--pages 10] [--cards 40] [--delay 0.5] [--save DIR]
+# Serves akakce-like result pages (/<urun>.html, /<urun>,<n>.html) on localhost,
+# so the crawler can be run and timed without the real site: same card markup
+# (li.w with data-mk/data-mn, a.pw_v8, the price selectors, div.p_w_v9 seller
+# links), deterministic content per page, an empty page after the last one and
+# an optional per-request delay standing in for network and render time. Pages
+# carry an ETag and If-None-Match gets a 304, as a caching server would answer.
+# --save writes the pages to files instead (page fixtures for bench_extract.py).
+
+import argparse
+import hashlib
+import os
+import random
+import re
+import threading
+import time
+from contextlib import contextmanager
+from html import escape
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+MARKALAR = ["Sony", "Microsoft", "Nintendo", "Logitech", "", "Razer"]
+SATICILAR = ["Hepsiburada", "Trendyol", "Amazon", "MediaMarkt", "Teknosa", "", "Vatan"]
+_SAYFA_YOLU = re.compile(r"^/([^/,]+?)(?:,(\d+))?\.html$")
+
+
+def _fiyat(rng):
+    return f"{rng.randint(500, 60000):,}".replace(",", ".") + f",{rng.choice(['00', '90', '99'])}"
+
+
+def kart_html(rng, urun, sayfa_no, i):
+    """One result card; the variants cover every branch of the extraction."""
+    marka, satici = rng.choice(MARKALAR), rng.choice(SATICILAR)
+    ad = f"{marka or 'Genel'} {urun.upper()} Model {sayfa_no}-{i} & \"Özel\" Sürüm"
+    parcalar = [f'<li class="w" data-pr="{sayfa_no * 1000 + i}"'
+                + (f' data-mk="{escape(marka)}"' if marka else "")
+                + (f' data-mn="{escape(satici)}"' if satici else "") + ">"]
+    if rng.random() > 0.03:
+        parcalar.append(f'<a class="pw_v8" href="/en-ucuz-{urun}-fiyati,{sayfa_no}{i}.html" '
+                        f'title="{escape(ad)}"><img src="/i/{i}.jpg" alt=""></a>')
+    parcalar.append(f'<h3 class="pn_v8">{escape(ad)}</h3>')
+    fiyat_turu = rng.random()
+    if fiyat_turu < 0.15:
+        # Empty discount badge before the real price: db_v9 has no text
+        parcalar.append(f'<span class="db_v9"></span><span class="pt_v8">{_fiyat(rng)}<i>TL</i></span>')
+    elif fiyat_turu < 0.35:
+        parcalar.append(f'<span class="pb_v8">\n  {_fiyat(rng)} <i>TL</i>\n</span>')
+    elif fiyat_turu < 0.8:
+        parcalar.append(f'<span class="pt_v8">{_fiyat(rng)}<i> TL</i></span>')
+    elif fiyat_turu < 0.9:
+        parcalar.append(f'<strong class="pt_v8">{_fiyat(rng)} TL</strong>')
+    elif fiyat_turu < 0.97:
+        parcalar.append(f'<div class="price"><b>{_fiyat(rng)}</b> TL</div>')
+    # else: no price at all
+    n_link = rng.choice([0, 0, 1, 1, 2, 3])
+    if n_link:
+        linkler = "".join(f'<a href="/c/?{sayfa_no}-{i}-{j}&amp;s={escape(satici or "x")}" rel="nofollow">'
+                          f'{escape(satici or "Satıcı")}</a>' for j in range(n_link))
+        parcalar.append(f'<div class="p_w_v9"><span class="l">{linkler}</span></div>')
+    parcalar.append("</li>")
+    return "".join(parcalar)
+
+
+def sayfa_html(urun, sayfa_no, sayfa_sayisi=10, kart_sayisi=40, seed=0):
+    """Result page ``sayfa_no`` of ``urun``; pages after ``sayfa_sayisi`` have no cards."""
+    rng = random.Random(f"{seed}-{urun}-{sayfa_no}")
+    if sayfa_no > sayfa_sayisi:
+        govde = '<div class="no_v8">Aradığınız kriterlere uygun ürün bulunamadı.</div>'
+    else:
+        kartlar = "\n".join(kart_html(rng, urun, sayfa_no, i) for i in range(kart_sayisi))
+        govde = f'<ul class="pl_v9 gv_v9">\n{kartlar}\n</ul>'
+    return (f'<!DOCTYPE html><html lang="tr"><head><meta charset="utf-8"><title>{escape(urun)} fiyatları'
+            f'</title><script>var p = "<li class=\\"w\\">";</script></head><body><header><ul class="m">'
+            f'<li class="w0"><a href="/">Akakçe</a></li></ul></header><main>{govde}</main>'
+            f'<footer><p>&copy; Fixture</p></footer></body></html>')
+
+
+def kaydet(directory, urun="ps5", pages=10, cards=40, seed=0):
+    """Write pages 1..``pages`` of ``urun`` as files; returns their paths."""
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for sayfa_no in range(1, pages + 1):
+        path = os.path.join(directory, f"{urun},{sayfa_no}.html")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(sayfa_html(urun, sayfa_no, pages, cards, seed))
+        paths.append(path)
+    return paths
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        eslesme = _SAYFA_YOLU.match(self.path.split("?")[0])
+        if eslesme is None:
+            self.send_error(404)
+            return
+        ayar = self.server.ayar
+        if ayar["delay"]:
+            time.sleep(ayar["delay"])
+        govde = sayfa_html(eslesme.group(1), int(eslesme.group(2) or 1), ayar["pages"], ayar["cards"],
+                           ayar["seed"]).encode("utf-8")
+        etag = '"%s"' % hashlib.sha1(govde).hexdigest()
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("ETag", etag)
+        self.send_header("Content-Length", str(len(govde)))
+        self.end_headers()
+        self.wfile.write(govde)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def sunucu(port=0, pages=10, cards=40, delay=0.0, seed=0):
+    server = ThreadingHTTPServer(("127.0.0.1", port), _Handler)
+    server.daemon_threads = True
+    server.ayar = {"pages": pages, "cards": cards, "delay": delay, "seed": seed}
+    return server
+
+
+@contextmanager
+def calistir(**ayar):
+    """Serve in a background thread; yields the base URL."""
+    server = sunucu(**ayar)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Akakçe benzeri sonuç sayfaları sunar")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--pages", type=int, default=10)
+    parser.add_argument("--cards", type=int, default=40)
+    parser.add_argument("--delay", type=float, default=0.0, help="Seconds before each response")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--save", metavar="DIR", help="Write the pages of 'ps5' here and exit")
+    args = parser.parse_args()
+
+    if args.save:
+        paths = kaydet(args.save, "ps5", args.pages, args.cards, args.seed)
+        print(f"{len(paths)} sayfa -> {args.save}")
+        return
+    server = sunucu(args.port, args.pages, args.cards, args.delay, args.seed)
+    print(f"http://127.0.0.1:{server.server_address[1]}/ps5.html")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+# --- SAYFA ÖNBELLEĞİ ---
+# Parsed rows of every fetched result page are kept on disk, one JSON file per
+# URL, with the validators the server sent (ETag / Last-Modified) and a hash of
+# the HTML:
+#   - younger than the TTL: the rows are reused and nothing is requested;
+#   - older: the HTTP worker revalidates (If-None-Match / If-Modified-Since) and
+#     a 304, or a body with the same hash, reuses the stored rows unparsed.
+# Entries are written atomically, so concurrent workers never read half a file.
+
+import hashlib
+import json
+import os
+import threading
+import time
+
+DEFAULT_TTL = 6 * 60 * 60
+
+
+class SayfaOnbellegi:
+    def __init__(self, directory, ttl=DEFAULT_TTL):
+        self.directory = directory
+        self.ttl = ttl
+        self.sayac = {"taze": 0, "dogrulandi": 0, "cekildi": 0}
+        self._kilit = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, url):
+        return os.path.join(self.directory, hashlib.sha1(url.encode("utf-8")).hexdigest() + ".json")
+
+    def oku(self, url):
+        """The stored entry of ``url`` or ``None``."""
+        try:
+            with open(self._path(url), encoding="utf-8") as f:
+                kayit = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return kayit if kayit.get("url") == url else None
+
+    def taze_mi(self, kayit):
+        return kayit is not None and time.time() - kayit["zaman"] < self.ttl
+
+    def yaz(self, url, satirlar, etag=None, last_modified=None, ozet=None):
+        kayit = {"url": url, "zaman": time.time(), "satirlar": satirlar, "etag": etag,
+                 "last_modified": last_modified, "ozet": ozet}
+        path = self._path(url)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(kayit, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+        return kayit
+
+    def yenile(self, kayit):
+        """Restart the TTL of an entry the server confirmed as unchanged."""
+        return self.yaz(kayit["url"], kayit["satirlar"], kayit["etag"], kayit["last_modified"], kayit["ozet"])
+
+    def say(self, sonuc):
+        with self._kilit:
+            self.sayac[sonuc] += 1
+
+    def temizle(self):
+        """Delete entries older than the TTL; returns how many went."""
+        silinen = 0
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if name.endswith(".json") and time.time() - os.path.getmtime(path) >= self.ttl:
+                os.remove(path)
+                silinen += 1
+        return silinen
+
+
+def ozet(icerik):
+    return hashlib.sha1(icerik).hexdigest()
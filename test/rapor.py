@@ -0,0 +1,88 @@
+# --- PDF RAPORU ---
+# The result table as a PDF that stays fast at tens of thousands of rows:
+#   - cell texts are truncated and encoded per column with pandas string ops
+#     instead of per cell inside df.iterrows();
+#   - pages are laid out here, a fixed number of rows each with the column
+#     headers repeated, and each page's grid is drawn with a few lines instead
+#     of one bordered cell per value.
+
+from akakce import KOLONLAR
+
+KOLON_GENISLIGI = 38
+SATIR_YUKSEKLIGI = 6
+BASLIK_YUKSEKLIGI = 8
+UST_BASLIK_YUKSEKLIGI = 10
+# Longer texts are cut to this many characters
+KISALTMA = {"Ürün": 25, "Satıcı Linki": 25}
+# The core PDF fonts are Latin-1: Turkish letters outside it are spelled without the accent
+_TR_HARFLER = str.maketrans("ıİşŞğĞ", "iIsSgG")
+
+
+# Türkçe karakter desteği için doğru kodlama
+def tr_encode(metin):
+    return metin.translate(_TR_HARFLER).encode('latin-1', 'replace').decode('latin-1')
+
+
+def pdf_hucreleri(df):
+    """Cell texts of every row, ready for the PDF (one tuple per row)."""
+    kolonlar = []
+    for kolon in KOLONLAR:
+        seri = df[kolon].astype(object).where(df[kolon].notna(), "").astype(str)
+        if kolon in KISALTMA:
+            seri = seri.str.slice(0, KISALTMA[kolon])
+        seri = seri.str.translate(_TR_HARFLER).str.encode('latin-1', 'replace').str.decode('latin-1')
+        kolonlar.append(seri.tolist())
+    return list(zip(*kolonlar))
+
+
+def _yeni_sayfa(pdf, basliklar, ust_baslik=None):
+    pdf.add_page()
+    if ust_baslik is not None:
+        pdf.set_font("Helvetica", size=10)
+        pdf.cell(200, UST_BASLIK_YUKSEKLIGI, ust_baslik, align='C')
+        pdf.ln()
+    pdf.set_font("Helvetica", 'B', 8)
+    for baslik in basliklar:
+        pdf.cell(KOLON_GENISLIGI, BASLIK_YUKSEKLIGI, baslik, 1, align='C')
+    pdf.ln()
+    pdf.set_font("Helvetica", size=8)
+
+
+def _satirlari_yaz(pdf, satirlar):
+    """Rows below the current position: grid lines once, then the texts."""
+    x0, y0 = pdf.l_margin, pdf.get_y()
+    genislik = KOLON_GENISLIGI * len(KOLONLAR)
+    y1 = y0 + SATIR_YUKSEKLIGI * len(satirlar)
+    for i in range(len(satirlar) + 1):
+        pdf.line(x0, y0 + i * SATIR_YUKSEKLIGI, x0 + genislik, y0 + i * SATIR_YUKSEKLIGI)
+    for j in range(len(KOLONLAR) + 1):
+        pdf.line(x0 + j * KOLON_GENISLIGI, y0, x0 + j * KOLON_GENISLIGI, y1)
+    # Baseline of the 8pt text, vertically centred like cell()
+    taban = SATIR_YUKSEKLIGI / 2 + 0.3 * pdf.font_size
+    for i, satir in enumerate(satirlar):
+        y = y0 + i * SATIR_YUKSEKLIGI + taban
+        for j, metin in enumerate(satir):
+            if metin:
+                pdf.text(x0 + j * KOLON_GENISLIGI + pdf.c_margin, y, metin)
+    pdf.set_y(y1)
+
+
+def pdf_yaz(df, baslik, path):
+    """Write ``df`` (the ``KOLONLAR`` columns) as a paginated table; returns the page count."""
+    from fpdf import FPDF
+
+    pdf = FPDF()
+    pdf.set_auto_page_break(False) # Pages are broken here, per block of rows
+    hucreler = pdf_hucreleri(df)
+    basliklar = [tr_encode(kolon) for kolon in KOLONLAR]
+    kullanilabilir = pdf.h - pdf.t_margin - pdf.b_margin - BASLIK_YUKSEKLIGI
+    ilk_sayfa = int((kullanilabilir - UST_BASLIK_YUKSEKLIGI) // SATIR_YUKSEKLIGI)
+    sayfa_basina = int(kullanilabilir // SATIR_YUKSEKLIGI)
+
+    _yeni_sayfa(pdf, basliklar, tr_encode(baslik))
+    _satirlari_yaz(pdf, hucreler[:ilk_sayfa])
+    for start in range(ilk_sayfa, len(hucreler), sayfa_basina):
+        _yeni_sayfa(pdf, basliklar)
+        _satirlari_yaz(pdf, hucreler[start:start + sayfa_basina])
+    pdf.output(path)
+    return pdf.page_no()
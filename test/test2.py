@@ -1,131 +1,110 @@
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.options import Options
-import pandas as pd
-from fpdf import FPDF
+# python test/test2.py [urun ...] [--queries-file FILE] [--mode browser|http] [--extract toplu|html|kart]
+#                       [--workers 4] [--max-pages 10] [--base-url URL] [--out DIR] [--format csv|parquet]
+#                       [--cache-dir DIR] [--ttl SECONDS] [--no-cache] [--no-pdf]
+# Scrapes every product query in turn through one bounded pool of workers
+# (test/akakce.py). Fetched pages are cached on disk (test/onbellek.py), so a run
+# within the TTL requests nothing and a later one skips the pages that did not
+# change. Each query gets <urun>_tum_sayfalar.csv|parquet (the CSV grows page by
+# page) and a PDF report (test/rapor.py); several queries also get a combined file.
+
+import argparse
+import os
 import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
 
-urun = "ps5"
-base_url = f"https://www.akakce.com/{urun}"
+from akakce import AYIKLAMA_MODLARI, DEFAULT_BASE_URL, KOLONLAR, MAX_SAYFA, HttpIsci, TarayiciIsci, tara
+from onbellek import DEFAULT_TTL, SayfaOnbellegi
+from rapor import pdf_yaz
 
-options = Options()
-options.add_argument("--disable-gpu")
-options.add_argument("--no-sandbox")
-options.add_argument("start-maximized")
-options.add_argument("user-agent=Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/117.0.0.0 Safari/537.36")
+DEFAULT_CACHE_DIR = ".akakce_cache"
 
-driver = webdriver.Chrome(options=options)
 
-def verileri_cek(driver):
-    kartlar = driver.find_elements(By.CSS_SELECTOR, "li.w")
-    data = []
+def sorgulari_oku(urunler, path=None):
+    """Queries from the command line and/or a file (one per line, # comments)."""
+    sorgular = list(urunler)
+    if path:
+        with open(path, encoding="utf-8") as f:
+            sorgular += [satir.split("#")[0].strip() for satir in f]
+    # Same query twice is scraped once
+    return list(dict.fromkeys(sorgu for sorgu in sorgular if sorgu))
 
-    for kart in kartlar:
-        try:
-            urun_adi = kart.find_element(By.CSS_SELECTOR, "a.pw_v8").get_attribute("title")
-        except:
-            urun_adi = "Ürün adı yok"
 
-        fiyat = "Fiyat yok"
-        for fiyat_selector in ["span.db_v9", "span.pb_v8", "span.pt_v8", "strong.pt_v8", "div.price"]:
+def tabloyu_yaz(df, path, format):
+    if format == "parquet":
+        df.to_parquet(path, index=False)
+    else:
+        df.to_csv(path, index=False)
+
+
+def isleri_calistir(sorgular, isci, workers=4, max_sayfa=MAX_SAYFA, base_url=DEFAULT_BASE_URL, out=".",
+                    format="csv", pdf=True, log=print):
+    """Scrape every query; returns ``{sorgu: DataFrame}`` (failed queries are left out)."""
+    os.makedirs(out, exist_ok=True)
+    sonuclar = {}
+    # One pool for every query: its threads keep their sessions / Chrome drivers
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for urun in sorgular:
+            start = time.perf_counter()
+            dosya = os.path.join(out, f"{urun}_tum_sayfalar")
             try:
-                fiyat = kart.find_element(By.CSS_SELECTOR, fiyat_selector).text.strip()
-                if fiyat:
-                    break
-            except:
+                # A CSV is streamed while the crawl runs, Parquet is written in one go
+                satirlar = tara(urun, isci, workers, max_sayfa, base_url,
+                                f"{dosya}.csv" if format == "csv" else None, log, pool)
+                df = pd.DataFrame(satirlar, columns=KOLONLAR)
+                if format != "csv":
+                    tabloyu_yaz(df, f"{dosya}.{format}", format)
+                log(f"✅ {urun}: toplam {len(df)} ürün kaydedildi ({time.perf_counter() - start:.1f}s).")
+                if pdf:
+                    sayfa = pdf_yaz(df, f"{urun.upper()} Arama Sonuçları", f"{dosya}.pdf")
+                    log(f"📄 {urun}: sonuçlar '{dosya}.pdf' olarak PDF'e kaydedildi ({sayfa} sayfa).")
+            except Exception as e:
+                log(f"Hata ({urun}): {e}")
                 continue
-
-        marka = kart.get_attribute("data-mk") or "Marka yok"
-        satici_adi = kart.get_attribute("data-mn") or "Satıcı yok"
-
-        linkler = kart.find_elements(By.CSS_SELECTOR, "div.p_w_v9 a")
-        if linkler:
-            for link in linkler:
-                satici_url = link.get_attribute("href")
-                data.append({
-                    "Ürün": urun_adi,
-                    "Fiyat": fiyat,
-                    "Satıcı": satici_adi,
-                    "Marka": marka,
-                    "Satıcı Linki": satici_url
-                })
-        else:
-            data.append({
-                "Ürün": urun_adi,
-                "Fiyat": fiyat,
-                "Satıcı": satici_adi,
-                "Marka": marka,
-                "Satıcı Linki": "-"
-            })
-    return data
-
-# Sayfayı aşağı kaydırarak tüm ürünleri yükleyelim
-def scroll_page(driver):
-    last_height = driver.execute_script("return document.body.scrollHeight")
-
-    while True:
-        driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-        time.sleep(2)
-        new_height = driver.execute_script("return document.body.scrollHeight")
-
-        if new_height == last_height:
-            break
-        last_height = new_height
-
-# Türkçe karakter desteği için doğru kodlama
-def tr_encode(metin):
-    return metin.encode('iso-8859-9', 'replace').decode('iso-8859-9')
-
-tum_veriler = []
-
-try:
-    for sayfa_no in range(1, 11):  # En fazla 10 sayfa kontrol et
-        sayfa_url = f"{base_url},{sayfa_no}.html" if sayfa_no > 1 else f"{base_url}.html"
-        print(f"{sayfa_no}. sayfa çekiliyor: {sayfa_url}")
-
-        driver.get(sayfa_url)
-        time.sleep(4)
-
-        scroll_page(driver)  # Sayfayı aşağıya kaydırarak tüm verileri yükle
-        sayfa_verileri = verileri_cek(driver)
-
-        if not sayfa_verileri:  # Sayfa boşsa döngüyü durdur
-            print(f"{sayfa_no}. sayfa boş, döngü durduruldu.")
-            break
-
-        tum_veriler.extend(sayfa_verileri)
-
-    df = pd.DataFrame(tum_veriler)
-    df.to_csv(f"{urun}_tum_sayfalar.csv", index=False)
-    print(f"✅ Toplam {len(df)} ürün başarıyla CSV olarak kaydedildi.")
-
-    # PDF oluşturma
-    pdf = FPDF()
-    pdf.add_page()
-    pdf.set_font("Arial", size=10)
-
-    pdf.cell(200, 10, txt=tr_encode(f"{urun.upper()} Arama Sonuçları"), ln=True, align='C')
-
-    headers = ["Ürün", "Fiyat", "Satıcı", "Marka", "Satıcı Linki"]
-    pdf.set_font("Arial", 'B', 8)
-    for header in headers:
-        pdf.cell(38, 8, tr_encode(header), 1, 0, 'C')
-    pdf.ln()
-
-    pdf.set_font("Arial", size=8)
-    for index, row in df.iterrows():
-        pdf.cell(38, 6, tr_encode(row["Ürün"][:25]), 1)
-        pdf.cell(38, 6, tr_encode(row["Fiyat"]), 1)
-        pdf.cell(38, 6, tr_encode(row["Satıcı"]), 1)
-        pdf.cell(38, 6, tr_encode(row["Marka"]), 1)
-        pdf.cell(38, 6, tr_encode(row["Satıcı Linki"][:25]), 1)
-        pdf.ln()
-
-    pdf.output(f"{urun}_tum_sayfalar.pdf")
-    print(f"📄 Sonuçlar '{urun}_tum_sayfalar.pdf' olarak PDF'e kaydedildi.")
-
-except Exception as e:
-    print("Hata:", e)
-
-finally:
-    driver.quit()
+            sonuclar[urun] = df
+
+    if len(sonuclar) > 1:
+        tum = pd.concat([df.assign(Sorgu=urun) for urun, df in sonuclar.items()], ignore_index=True)
+        tabloyu_yaz(tum, os.path.join(out, f"tum_urunler.{format}"), format)
+    return sonuclar
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Akakçe arama sonuçlarını CSV/Parquet ve PDF'e kaydeder")
+    parser.add_argument("urunler", nargs="*", help="Product queries (default: ps5)")
+    parser.add_argument("--queries-file", help="More queries, one per line")
+    parser.add_argument("--mode", choices=("browser", "http"), default="browser",
+                        help="Chrome drivers (Selenium) or plain HTTP requests")
+    parser.add_argument("--extract", choices=AYIKLAMA_MODLARI, default="toplu",
+                        help="Browser mode: one script call per page, page_source parsing or per-card calls")
+    parser.add_argument("--workers", type=int, default=4, help="Pages fetched at the same time")
+    parser.add_argument("--max-pages", type=int, default=MAX_SAYFA)
+    parser.add_argument("--base-url", default=DEFAULT_BASE_URL, help="e.g. the fixture server's URL")
+    parser.add_argument("--headless", action="store_true")
+    parser.add_argument("--out", default=".", help="Output directory")
+    parser.add_argument("--format", choices=("csv", "parquet"), default="csv")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR)
+    parser.add_argument("--ttl", type=float, default=DEFAULT_TTL, help="Seconds a fetched page is reused as is")
+    parser.add_argument("--no-cache", action="store_true")
+    parser.add_argument("--no-pdf", action="store_true")
+    args = parser.parse_args()
+
+    sorgular = sorgulari_oku(args.urunler, args.queries_file) or ["ps5"]
+    onbellek = None if args.no_cache else SayfaOnbellegi(args.cache_dir, args.ttl)
+    if args.mode == "browser":
+        isci = TarayiciIsci(args.headless, args.extract, onbellek)
+    else:
+        isci = HttpIsci(onbellek=onbellek)
+    start = time.perf_counter()
+    try:
+        sonuclar = isleri_calistir(sorgular, isci, args.workers, args.max_pages, args.base_url, args.out,
+                                   args.format, not args.no_pdf)
+    finally:
+        isci.kapat()
+    print(f"{len(sonuclar)}/{len(sorgular)} sorgu tamamlandı ({time.perf_counter() - start:.1f}s)"
+          + (f"; sayfalar: {onbellek.sayac}" if onbellek is not None else ""))
+
+
+if __name__ == "__main__":
+    main()